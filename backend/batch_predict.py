@@ -0,0 +1,137 @@
+"""
+Predice el precio de todos los jugadores de un CSV.
+
+Lee el archivo en chunks, los reparte entre procesos que cargan el modelo una
+sola vez cada uno, y va escribiendo los resultados a CSV o Parquet en orden,
+así que la memoria usada no depende del tamaño del archivo.
+
+    python batch_predict.py player-data-full.csv -o predicciones.parquet
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from log_config import get_logger
+from model_registry import default_model_path
+from model_utils import load_model_components, predict_new_data
+
+logger = get_logger("batch")
+
+_worker_components = None
+
+
+def _init_worker(model_path):
+    """
+    Carga el modelo una vez por proceso; XGBoost usa un solo thread porque
+    el paralelismo ya viene de los procesos
+    """
+    global _worker_components
+    _worker_components = load_model_components(model_path)
+    if _worker_components is None:
+        raise RuntimeError(f"No se pudo cargar el modelo {model_path}")
+    model = _worker_components['model']
+    booster = getattr(model, 'booster', None)
+    if booster is None:
+        regressor = getattr(model, 'named_steps', {}).get('regressor')
+        booster = regressor.get_booster() if regressor is not None else None
+    if booster is not None:
+        booster.set_param({'nthread': 1})
+
+
+def _predict_chunk(chunk):
+    return predict_new_data(chunk, _worker_components)
+
+
+class _ResultWriter:
+    """
+    Escribe los chunks predichos a CSV o Parquet a medida que llegan
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise RuntimeError("Para escribir Parquet hace falta instalar pyarrow")
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_csv(input_path, output_path, model_path=None, chunksize=5000, workers=None):
+    """
+    Predice todas las filas de `input_path` y escribe el resultado en `output_path`
+    (con el mismo modelo que la API si no se pasa `model_path`).
+
+    Devuelve la cantidad de filas procesadas.
+    """
+    model_path = model_path or default_model_path()
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2  # Limita los chunks en memoria a la vez
+    writer = _ResultWriter(output_path)
+    pending = deque()
+    rows = 0
+    start = time.perf_counter()
+
+    def drain_one():
+        nonlocal rows
+        result = pending.popleft().result()
+        writer.write(result)
+        rows += len(result)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path,)) as executor:
+            for chunk in pd.read_csv(input_path, chunksize=chunksize):
+                pending.append(executor.submit(_predict_chunk, chunk))
+                if len(pending) >= max_pending:
+                    drain_one()
+            while pending:
+                drain_one()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Batch terminado", extra={
+        "input": input_path, "output": output_path, "rows": rows,
+        "seconds": round(elapsed, 2), "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predice precios para un CSV de jugadores")
+    parser.add_argument("input", help="CSV de entrada (p. ej. player-data-full.csv)")
+    parser.add_argument("-o", "--output", default="predicciones.csv",
+                        help="Archivo de salida (.csv o .parquet)")
+    parser.add_argument("-m", "--model", default=None,
+                        help="Artefacto o pickle (por defecto el mismo que usa la API)")
+    parser.add_argument("--chunksize", type=int, default=5000, help="Filas por chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, uno por core)")
+    args = parser.parse_args()
+
+    rows = score_csv(args.input, args.output, args.model, args.chunksize, args.workers)
+    print(f"✅ {rows} filas predichas -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Paridad y velocidad de los motores de inferencia (ver inference_engine.py).
+
+Carga el pickle, arma cada motor (pipeline, scaled, folded) y compara sus
+predicciones contra el Pipeline de sklearn sobre filas sintéticas; después
+mide predict_prices de punta a punta con lotes chicos, que es el caso de
+/predict. Sale con código 1 si algún motor difiere más que --tolerance:
+
+    python benchmarks/engine_parity.py --rows 100000 --output engines.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_engine import ENGINES, native_model
+from micro import environment, make_rows, timeit
+from model_registry import DEFAULT_PICKLE
+from model_utils import load_model_components, predict_prices, preprocess_to_matrix
+
+DEFAULT_SIZES = [1, 30, 1000]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad de los motores de inferencia")
+    parser.add_argument("--model", default=DEFAULT_PICKLE, help="Pickle con el Pipeline")
+    parser.add_argument("--rows", type=int, default=20000, help="Filas para comparar predicciones")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Diferencia máxima aceptada")
+    parser.add_argument("--output", help="Guarda el resultado como JSON")
+    args = parser.parse_args()
+
+    components = load_model_components(args.model)
+    pipeline = components.get('pipeline')
+    if pipeline is None:
+        sys.exit(f"{args.model} no tiene un Pipeline de sklearn para comparar")
+
+    data = make_rows(args.rows)
+    X = preprocess_to_matrix(data, components)
+    expected = pipeline.predict(pd.DataFrame(X.astype(np.float64), columns=components['feature_columns']))
+
+    results = {}
+    for engine in ENGINES:
+        engine_components = {**components, 'model': native_model(pipeline, engine)}
+        if engine == "pipeline":
+            predictions = expected
+        else:
+            predictions = engine_components['model'].predict(X)
+        diff = np.abs(np.asarray(predictions, dtype=np.float64) - expected)
+        results[engine] = {
+            "max_abs_diff": float(diff.max()),
+            "mismatched_rows": int((diff > args.tolerance).sum()),
+            "predict_prices": {str(size): timeit(lambda rows=make_rows(size, seed=size):
+                                                 predict_prices(rows, engine_components),
+                                                 repeat=args.repeat)
+                               for size in args.sizes},
+        }
+
+    result = {"environment": environment(), "rows": args.rows, "tolerance": args.tolerance,
+              "engines": results}
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if any(engine["mismatched_rows"] for engine in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Servidor HTTP local que imita la búsqueda de futbin para los benchmarks.
+
+Responde /players?search=... con una página guardada: si existe
+fixtures/<nombre normalizado>.html usa esa, si no fixtures/futbin_players.html.
+Con --delay se simula la latencia de futbin.
+
+    python benchmarks/futbin_stub.py --port 8765 --delay 0.2
+    FUTBIN_BASE_URL=http://127.0.0.1:8765 FUTBIN_FETCH_MODE=http uvicorn main:app
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import normalize_player_name
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+DEFAULT_FIXTURE = "futbin_players.html"
+
+
+class FutbinStub:
+    """
+    Servidor en un thread aparte; `requests` cuenta las búsquedas recibidas
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fixtures_dir=FIXTURES_DIR):
+        self.delay = delay
+        self.fixtures_dir = fixtures_dir
+        self.requests = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                if url.path.rstrip('/') != '/players':
+                    self.send_error(404)
+                    return
+                query = urllib.parse.parse_qs(url.query).get('search', [''])[0]
+                body = stub.page_for(query)
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_for(self, query):
+        # Las páginas se leen una vez y quedan en memoria
+        name = normalize_player_name(query).replace(' ', '_')
+        path = os.path.join(self.fixtures_dir, f"{name}.html")
+        if not name or not os.path.isfile(path):
+            path = os.path.join(self.fixtures_dir, DEFAULT_FIXTURE)
+        page = self._pages.get(path)
+        if page is None:
+            with open(path, 'rb') as f:
+                page = self._pages[path] = f.read()
+        return page
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="futbin-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Futbin local para benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Latencia simulada en segundos")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    stub = FutbinStub(args.host, args.port, args.delay, args.fixtures)
+    print(f"Futbin local en {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark de punta a punta de /predict contra el futbin local.
+
+Levanta el futbin local y la API (uvicorn en un subproceso) salvo que se
+pase --url, manda requests con `--concurrency` clientes en paralelo y
+reporta latencias p50/p95/p99, requests por segundo y memoria pico del
+servidor (VmHWM de /proc):
+
+    python benchmarks/load_test.py --concurrency 8 --requests 400 --output load.json
+
+Por defecto cada request usa un nombre distinto de una lista de --names
+jugadores, así se mide tanto el scraping como el cache.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from futbin_stub import FutbinStub
+
+
+def read_memory(pid):
+    """
+    VmRSS y VmHWM (pico) del proceso, en MB; None si no hay /proc
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+    return {key: int(fields[key].split()[0]) / 1024 for key in ("VmRSS", "VmHWM") if key in fields}
+
+
+def start_server(port, futbin_url, env_overrides):
+    env = dict(os.environ)
+    env.update({
+        "FUTBIN_BASE_URL": futbin_url,
+        "FUTBIN_FETCH_MODE": "http",
+        "LOG_LEVEL": "WARNING",
+        # Sin índice local: todas las consultas pasan por el scraping
+        "PLAYER_INDEX_PATH": os.path.join(BACKEND_DIR, "benchmarks", ".no-index"),
+    })
+    env.update(env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/admin/model", timeout=1) as response:
+                if json.load(response).get("loaded"):
+                    return process, url
+        except OSError:
+            pass
+        if process.poll() is not None:
+            raise SystemExit("El servidor no arrancó")
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("El servidor no cargó el modelo a tiempo")
+
+
+def post_predict(url, player_name, live):
+    body = json.dumps({"player_name": player_name, "live": live}).encode()
+    request = urllib.request.Request(f"{url}/predict", data=body,
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def run_load(url, total, concurrency, names, live=False, warmup=0):
+    """
+    Manda `total` requests con `concurrency` clientes; devuelve el resumen
+    """
+    for i in range(warmup):
+        post_predict(url, names[i % len(names)], live)
+
+    latencies = np.zeros(total)
+    statuses = np.zeros(total, dtype=np.int32)
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            latencies[i], statuses[i] = post_predict(url, names[i % len(names)], live)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - start
+
+    ok = statuses == 200
+    ms = latencies[ok] * 1000
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": int(ok.sum()),
+        "errors": {str(code): int((statuses == code).sum()) for code in np.unique(statuses[~ok])},
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+            "p95": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+            "p99": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+            "max": round(float(ms.max()), 2) if len(ms) else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de /predict")
+    parser.add_argument("--url", help="API ya levantada (si no, se levanta una)")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--names", type=int, default=50, help="Cantidad de jugadores distintos")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.0, help="Latencia simulada de futbin")
+    parser.add_argument("--live", action="store_true", help="Manda live=true en cada request")
+    parser.add_argument("--env", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="Variables de entorno extra para el servidor")
+    parser.add_argument("--output", help="Guarda el resultado como JSON")
+    args = parser.parse_args()
+
+    names = [f"Jugador {i}" for i in range(args.names)]
+    stub = process = None
+    try:
+        if args.url:
+            url = args.url
+        else:
+            stub = FutbinStub(delay=args.delay).start()
+            overrides = dict(item.split('=', 1) for item in args.env)
+            process, url = start_server(args.port, stub.base_url, overrides)
+
+        result = run_load(url, args.requests, args.concurrency, names, args.live, args.warmup)
+        result["names"] = args.names
+        result["futbin_delay_s"] = args.delay
+        if process is not None:
+            result["server_memory_mb"] = read_memory(process.pid)
+        if stub is not None:
+            result["futbin_requests"] = stub.requests
+        try:
+            with urllib.request.urlopen(f"{url}/cache/stats", timeout=5) as response:
+                result["cache"] = json.load(response)
+        except OSError:
+            pass
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if stub is not None:
+            stub.stop()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Micro-benchmarks del modelo: preprocess_new_data, predict_new_data y
+load_model_components, con lotes de 1 a 100k filas.
+
+Las filas se arman a partir de la base local (player-data-full.csv) sumando
+las columnas que trae el scraping (liga, posiciones, pie, etc.). El resultado
+se guarda como JSON y se puede comparar contra una corrida anterior:
+
+    python benchmarks/micro.py --output base.json
+    python benchmarks/micro.py --compare base.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from model_utils import league_mapping, load_model_components, predict_new_data, preprocess_new_data
+from model_registry import DEFAULT_ARTIFACT_DIR, DEFAULT_PICKLE
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+POSITIONS = ['GK', 'CB', 'LB', 'RB', 'CDM', 'CM', 'CAM', 'LM', 'RM', 'LW', 'RW', 'ST']
+
+
+def make_rows(size, seed=0):
+    """
+    `size` filas con el mismo formato que devuelve el scraping
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(os.path.join(BACKEND_DIR, "player-data-full.csv"))
+    data = base.sample(n=size, replace=True, random_state=seed).reset_index(drop=True)
+    data['club_league_name'] = rng.choice(list(league_mapping.values()), size)
+    data['preferred_foot'] = rng.choice(['Right', 'Left'], size)
+    data['positions'] = [','.join(rng.choice(POSITIONS, rng.integers(1, 3), replace=False))
+                         for _ in range(size)]
+    data['height_cm'] = rng.integers(165, 200, size)
+    data['weight_kg'] = rng.integers(60, 95, size)
+    data['weak_foot'] = rng.integers(1, 6, size)
+    data['skill_moves'] = rng.integers(1, 6, size)
+    data['overall_rating'] = rng.integers(60, 95, size)
+    return data
+
+
+def timeit(fn, repeat, min_time=0.2):
+    """
+    Corre `fn` al menos `repeat` veces (y al menos `min_time` segundos);
+    devuelve estadísticas en milisegundos
+    """
+    fn()  # calentamiento
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= 1000:
+            break
+    times = np.array(times) * 1000
+    return {"runs": len(times), "min_ms": round(float(times.min()), 4),
+            "median_ms": round(float(np.median(times)), 4),
+            "p95_ms": round(float(np.percentile(times, 95)), 4)}
+
+
+def run(sizes, repeat, model_paths):
+    results = {"load_model_components": {}, "preprocess_new_data": {}, "predict_new_data": {}}
+
+    for path in model_paths:
+        if os.path.exists(path):
+            results["load_model_components"][os.path.basename(path)] = \
+                timeit(lambda: load_model_components(path), repeat=min(repeat, 5), min_time=0)
+
+    components = load_model_components(model_paths[0])
+    for size in sizes:
+        data = make_rows(size)
+        rows_repeat = repeat if size <= 10000 else max(1, repeat // 5)
+        for name, fn in (("preprocess_new_data", preprocess_new_data),
+                         ("predict_new_data", predict_new_data)):
+            stats = timeit(lambda: fn(data.copy(), components), repeat=rows_repeat,
+                           min_time=0.2 if size <= 10000 else 0)
+            stats["rows_per_s"] = round(size / (stats["median_ms"] / 1000), 1)
+            results[name][str(size)] = stats
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__}
+
+
+def compare(current, baseline):
+    """
+    Imprime la variación de la mediana respecto de una corrida anterior
+    """
+    for bench, cases in current["results"].items():
+        for case, stats in cases.items():
+            old = baseline.get("results", {}).get(bench, {}).get(case)
+            if not old:
+                continue
+            change = (stats["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+            print(f"{bench:24} {case:>16} {old['median_ms']:>10.3f} ms -> "
+                  f"{stats['median_ms']:>10.3f} ms  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks del modelo")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--model", action="append", default=None,
+                        help="Modelo(s) a cargar; el primero se usa para predecir")
+    parser.add_argument("--output", help="Guarda el resultado como JSON")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    model_paths = args.model or [DEFAULT_ARTIFACT_DIR, DEFAULT_PICKLE]
+    result = {"environment": environment(), "sizes": args.sizes,
+              "results": run(args.sizes, args.repeat, model_paths)}
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(result, json.load(f))
+    else:
+        print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
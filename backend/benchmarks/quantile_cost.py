@@ -0,0 +1,105 @@
+"""
+Costo de predecir cuantiles (p10/p50/p90) contra el modelo de una sola salida.
+
+Entrena boosters con la misma cantidad de rondas y los mismos hiperparámetros
+que el modelo actual sobre filas sintéticas (el objetivo son las predicciones del modelo
+actual: solo interesa el costo, no la calidad) y mide inplace_predict con
+lotes de 1 a 100k filas:
+
+    single           reg:squarederror, una salida (como hoy)
+    quantile_trees   reg:quantileerror, un árbol por cuantil y ronda
+    quantile_vector  reg:quantileerror con hojas vectoriales (multi_output_tree)
+
+También corre predict_new_data con el booster de cuantiles para comprobar
+que salen las columnas de bandas:
+
+    python benchmarks/quantile_cost.py --output quantiles.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import xgboost as xgb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro import environment, make_rows, timeit
+from inference_engine import ScaledBoosterModel, training_params
+from model_registry import default_model_path
+from model_utils import load_model_components, predict_new_data, preprocess_to_matrix
+
+QUANTILES = [0.1, 0.5, 0.9]
+DEFAULT_SIZES = [1, 100, 10000, 100000]
+
+
+def _booster_shape(components):
+    """
+    Rondas e hiperparámetros del modelo actual (los del manifest o los del
+    regresor: save_config() de un booster cargado devuelve los por defecto)
+    """
+    model = components['model']
+    booster = model.booster if hasattr(model, 'booster') else \
+        model.named_steps['regressor'].get_booster()
+    return booster.num_boosted_rounds(), training_params(components)
+
+
+def train_variants(X, y, rounds, params):
+    base = {"tree_method": "hist", **params, "nthread": os.cpu_count() or 1}
+    dtrain = xgb.DMatrix(X, y)
+    quantile = {**base, "objective": "reg:quantileerror", "quantile_alpha": np.array(QUANTILES)}
+    return {
+        "single": xgb.train({**base, "objective": "reg:squarederror"}, dtrain, rounds),
+        "quantile_trees": xgb.train(quantile, dtrain, rounds),
+        "quantile_vector": xgb.train({**quantile, "multi_strategy": "multi_output_tree"}, dtrain, rounds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de predecir cuantiles")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Guarda el resultado como JSON")
+    args = parser.parse_args()
+
+    components = load_model_components(default_model_path())
+    train = make_rows(args.train_rows, seed=1)
+    X_train = preprocess_to_matrix(train, components)
+    y_train = predict_new_data(train.copy(), components)['predicted_price'].to_numpy()
+    rounds, params = _booster_shape(components)
+    boosters = train_variants(X_train, y_train, rounds, params)
+
+    results = {}
+    for size in args.sizes:
+        X = np.ascontiguousarray(preprocess_to_matrix(make_rows(size), components))
+        results[str(size)] = {}
+        for name, booster in boosters.items():
+            stats = timeit(lambda: booster.inplace_predict(X), repeat=args.repeat,
+                           min_time=0.2 if size <= 10000 else 0)
+            results[str(size)][name] = stats
+        single = results[str(size)]["single"]["median_ms"]
+        for name in ("quantile_trees", "quantile_vector"):
+            results[str(size)][name]["vs_single"] = round(results[str(size)][name]["median_ms"] / single, 2)
+
+    # Punta a punta con el booster de cuantiles en el lugar del modelo actual
+    model = components.get('pipeline', components['model'])
+    mean, scale = (model.mean, model.scale) if isinstance(model, ScaledBoosterModel) else \
+        (model.named_steps['scaler'].mean_, model.named_steps['scaler'].scale_)
+    quantile_components = {**components, 'quantiles': QUANTILES,
+                           'model': ScaledBoosterModel(boosters["quantile_trees"], mean, scale)}
+    sample = predict_new_data(make_rows(5, seed=2), quantile_components)
+    band_check = sample[['predicted_price_p10', 'predicted_price', 'predicted_price_p90']].round(2)
+
+    result = {"environment": environment(), "rounds": rounds, "params": params,
+              "quantiles": QUANTILES, "results": results,
+              "sample_bands": band_check.to_dict(orient="records")}
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
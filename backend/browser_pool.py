@@ -0,0 +1,217 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+from log_config import get_logger
+from tracing import stage
+
+logger = get_logger("browser_pool")
+
+
+# Configuración del pool (se puede sobreescribir con variables de entorno)
+POOL_SIZE = int(os.getenv("FUTBIN_POOL_SIZE", "2"))
+MAX_USES_PER_BROWSER = int(os.getenv("FUTBIN_POOL_MAX_USES", "50"))
+ACQUIRE_TIMEOUT = float(os.getenv("FUTBIN_POOL_ACQUIRE_TIMEOUT", "30"))
+# Bloquear imágenes, fuentes y CSS: el scraping solo lee el HTML
+BLOCK_RESOURCES = os.getenv("FUTBIN_BLOCK_RESOURCES", "1") == "1"
+BLOCKED_URL_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+                        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css"]
+
+
+class BrowserPoolTimeout(Exception):
+    """
+    Todos los navegadores del pool están ocupados y se agotó la espera
+    """
+
+
+def create_chrome_driver():
+    """
+    Crea un Chrome headless para Colab / Linux
+    """
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    # driver.get vuelve cuando el HTML está parseado, sin esperar imágenes ni iframes
+    chrome_options.page_load_strategy = 'eager'
+    if BLOCK_RESOURCES:
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+    driver = webdriver.Chrome(options=chrome_options)
+
+    if BLOCK_RESOURCES:
+        # Las prefs no cubren todo (p. ej. fuentes de @font-face): se cortan por URL con CDP.
+        # Los <img> siguen en el DOM con su src/title, que es lo que lee el parser
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            logger.warning("No se pudieron bloquear recursos por CDP", extra={"error": str(e)})
+    return driver
+
+
+class _PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """
+    Pool de sesiones de Chrome ya iniciadas que se reutilizan entre requests.
+
+    Los navegadores se crean a demanda hasta `size`, se reciclan después de
+    `max_uses` usos o si fallan, y `acquire` espera como máximo `acquire_timeout`
+    segundos cuando están todos ocupados.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES_PER_BROWSER,
+                 acquire_timeout=ACQUIRE_TIMEOUT, driver_factory=create_chrome_driver):
+        if size < 1:
+            raise ValueError("El pool necesita al menos un navegador")
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self.driver_factory = driver_factory
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._all = set()
+        self._closed = False
+
+    def _is_healthy(self, browser):
+        try:
+            browser.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _destroy(self, browser):
+        with self._lock:
+            self._all.discard(browser)
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning("Error cerrando navegador", extra={"error": str(e)})
+
+    def _new_browser(self):
+        with stage("chrome_launch"):
+            browser = _PooledBrowser(self.driver_factory())
+        with self._lock:
+            self._all.add(browser)
+        return browser
+
+    def acquire(self, timeout=None):
+        """
+        Devuelve un navegador sano del pool, creando uno nuevo si hace falta
+        """
+        if self._closed:
+            raise RuntimeError("El pool de navegadores está cerrado")
+
+        timeout = self.acquire_timeout if timeout is None else timeout
+        with stage("browser_wait"):
+            got_slot = self._slots.acquire(timeout=timeout)
+        if not got_slot:
+            raise BrowserPoolTimeout(
+                f"No hay navegadores libres después de {timeout:.1f}s")
+
+        try:
+            while True:
+                try:
+                    browser = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_browser()
+                if self._is_healthy(browser):
+                    return browser
+                # Navegador caído: se descarta y se prueba con el siguiente
+                self._destroy(browser)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, browser, broken=False):
+        """
+        Devuelve un navegador al pool, reciclándolo si falló o llegó a max_uses
+        """
+        try:
+            browser.uses += 1
+            if broken or self._closed or browser.uses >= self.max_uses:
+                self._destroy(browser)
+            else:
+                self._idle.put(browser)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Context manager que presta un driver y lo devuelve al salir.
+
+        Si el bloque lanza una excepción y el navegador no responde, se recicla.
+        """
+        browser = self.acquire(timeout)
+        broken = False
+        try:
+            yield browser.driver
+        except BaseException:
+            broken = not self._is_healthy(browser)
+            raise
+        finally:
+            self.release(browser, broken=broken)
+
+    def warm_up(self, count=None):
+        """
+        Inicia navegadores por adelantado para no pagar el arranque en el primer request
+        """
+        count = self.size if count is None else min(count, self.size)
+        browsers = [self.acquire() for _ in range(count)]
+        for browser in browsers:
+            self.release(browser)
+
+    def stats(self):
+        with self._lock:
+            total = len(self._all)
+        return {"size": self.size, "started": total, "idle": self._idle.qsize()}
+
+    def close(self):
+        """
+        Cierra todos los navegadores del pool
+        """
+        self._closed = True
+        with self._lock:
+            browsers = list(self._all)
+        for browser in browsers:
+            self._destroy(browser)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Devuelve el pool global, creándolo la primera vez
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = BrowserPool()
+        return _pool
+
+
+def close_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,233 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from log_config import get_logger
+
+logger = get_logger("cache")
+
+
+# Configuración del cache de scraping (se puede sobreescribir con variables de entorno)
+CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_SIZE", "512"))
+CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "600"))
+CACHE_STALE_TTL = float(os.getenv("SCRAPE_CACHE_STALE_TTL", "3600"))
+CACHE_DB_PATH = os.getenv("SCRAPE_CACHE_DB", "")
+
+
+def normalize_player_name(name: str) -> str:
+    """
+    Normaliza un nombre para usarlo como clave: sin acentos, minúsculas y
+    espacios colapsados ("  Mbappé " -> "mbappe")
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.casefold().split())
+
+
+def _json_default(value):
+    # Los valores que vienen de pandas son escalares de numpy
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"No se puede serializar {type(value).__name__}")
+
+
+class _DiskTier:
+    """
+    Segundo nivel del cache en sqlite, sobrevive a reinicios del servidor
+    """
+
+    def __init__(self, path, encode, decode):
+        self._encode = encode
+        self._decode = decode
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, payload TEXT NOT NULL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, payload FROM scrape_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], self._decode(json.loads(row[1]))
+        except (ValueError, TypeError, KeyError):
+            # Entrada de un formato viejo o corrupta: se trata como miss
+            return None
+
+    def set(self, key, stored_at, value):
+        payload = json.dumps(self._encode(value), default=_json_default)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (key, stored_at, payload) VALUES (?, ?, ?)",
+                (key, stored_at, payload))
+
+    def delete_older_than(self, cutoff):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM scrape_cache WHERE stored_at < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ScrapeCache:
+    """
+    Cache de dos niveles para los resultados de get_player_data_from_futbin.
+
+    El primer nivel es un LRU en memoria y el segundo (opcional) un sqlite en
+    disco. Una entrada es fresca durante `ttl` segundos; después, y hasta
+    `stale_ttl`, se sirve igual pero se marca como vieja para que se refresque
+    en segundo plano (stale-while-revalidate).
+
+    `encode`/`decode` convierten los valores a y desde algo serializable en
+    JSON para el nivel en disco.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL,
+                 stale_ttl=CACHE_STALE_TTL, db_path=CACHE_DB_PATH,
+                 encode=lambda value: value, decode=lambda value: value):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._disk = _DiskTier(db_path, encode, decode) if db_path else None
+        if self._disk is not None:
+            self._disk.delete_older_than(time.time() - self.stale_ttl)
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "evictions": 0,
+        }
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _store_in_memory(self, key, stored_at, value):
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get(self, player_name):
+        """
+        Busca un jugador en el cache.
+
+        Devuelve (valor, estado) con estado "fresh" o "stale", o (None, None)
+        si no hay una entrada utilizable.
+        """
+        key = normalize_player_name(player_name)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        tier = "memory_hits"
+
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            tier = "disk_hits"
+            if entry is not None:
+                self._store_in_memory(key, *entry)
+
+        if entry is None:
+            self._count("misses")
+            return None, None
+
+        stored_at, value = entry
+        age = now - stored_at
+        if age <= self.ttl:
+            self._count(tier)
+            return value, "fresh"
+        if age <= self.stale_ttl:
+            self._count("stale_hits")
+            return value, "stale"
+
+        self._count("misses")
+        return None, None
+
+    def fresh_for(self, player_name):
+        """
+        Segundos que le quedan fresca a la entrada en memoria (0 si no hay o está vieja)
+        """
+        with self._lock:
+            entry = self._memory.get(normalize_player_name(player_name))
+        if entry is None:
+            return 0.0
+        return max(0.0, self.ttl - (time.time() - entry[0]))
+
+    def set(self, player_name, value):
+        key = normalize_player_name(player_name)
+        stored_at = time.time()
+        self._store_in_memory(key, stored_at, value)
+        if self._disk is not None:
+            self._disk.set(key, stored_at, value)
+
+    def fetch_and_store(self, player_name, fetch):
+        """
+        Llama a `fetch(player_name)` y guarda el resultado si no está vacío
+        """
+        value = fetch(player_name)
+        if value:
+            self.set(player_name, value)
+        return value
+
+    def refresh_in_background(self, player_name, fetch, executor):
+        """
+        Refresca una entrada vieja en `executor` sin bloquear al que la pidió.
+
+        Si ya hay un refresco en curso para ese jugador no se lanza otro.
+        """
+        key = normalize_player_name(player_name)
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+            self.stats["refreshes"] += 1
+
+        def refresh():
+            try:
+                return self.fetch_and_store(player_name, fetch)
+            except Exception:
+                logger.exception("Error refrescando cache", extra={"player": player_name})
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        try:
+            return executor.submit(refresh)
+        except RuntimeError:
+            # El executor ya se cerró (apagando el servidor)
+            with self._lock:
+                self._refreshing.discard(key)
+            return None
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["disk_tier"] = self._disk is not None
+        return stats
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
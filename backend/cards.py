@@ -0,0 +1,78 @@
+import numpy as np
+
+
+# Columnas de features que usa el modelo y columnas informativas de la carta
+FEATURE_COLUMNS = ["player_id", "club_league_name", "preferred_foot", "positions",
+                   "height_cm", "weight_kg", "weak_foot", "skill_moves", "overall_rating",
+                   "age", "pace", "shooting", "passing", "dribbling", "defending", "physic"]
+META_COLUMNS = ["Name", "card", "price", "link"]
+COLUMNS = FEATURE_COLUMNS + META_COLUMNS
+
+
+class CardBatch:
+    """
+    Cartas de un jugador en formato columnar: un array de numpy por columna.
+
+    Es lo que devuelve el scraper, lo que guarda el cache y lo que recibe el
+    modelo (PreprocessPlan acepta `batch.columns` directamente), así no hay que
+    pasar por dicts por fila ni hacer merges entre features y meta.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["player_id"]) if "player_id" in self.columns else 0
+
+    def __getitem__(self, col):
+        return self.columns[col]
+
+    @classmethod
+    def empty(cls):
+        return cls({col: np.array([], dtype=object) for col in COLUMNS})
+
+    @classmethod
+    def concat(cls, batches):
+        """
+        Une varias tandas de cartas (p. ej. las de iter_player_cards) en una sola
+        """
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        return cls({col: np.concatenate([batch.columns[col] for batch in batches])
+                    for col in batches[0].columns})
+
+    def to_records(self, predicted_price=None, bands=None):
+        """
+        Arma la respuesta de /predict: una lista de dicts por carta, con el
+        orden de columnas de siempre (features, predicted_price, bandas, meta)
+        """
+        names = list(FEATURE_COLUMNS)
+        values = [self.columns[col].tolist() for col in FEATURE_COLUMNS]
+        if predicted_price is not None:
+            names.append("predicted_price")
+            values.append(np.round(np.asarray(predicted_price, dtype=np.float64), 2).tolist())
+        for col, band in (bands or {}).items():
+            names.append(col)
+            values.append(np.round(np.asarray(band, dtype=np.float64), 2).tolist())
+        names.extend(META_COLUMNS)
+        values.extend(self.columns[col].tolist() for col in META_COLUMNS)
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def to_json(self):
+        """
+        Columnas como listas (para el cache en disco)
+        """
+        return {col: array.tolist() for col, array in self.columns.items()}
+
+    @classmethod
+    def from_json(cls, data):
+        # Antes el cache guardaba una lista de dicts (una por carta)
+        if not isinstance(data, dict):
+            raise TypeError("Formato de cartas desconocido")
+        columns = {}
+        for col, values in data.items():
+            array = np.asarray(values)
+            # Las columnas de texto con None quedan como object
+            columns[col] = array if array.dtype.kind in "iufb" else np.asarray(values, dtype=object)
+        return cls(columns)
@@ -0,0 +1,271 @@
+"""
+Scraping masivo de futbin para refrescar muchos jugadores (p. ej. de noche).
+
+Recorre varios jugadores en paralelo y varias páginas de resultados por
+jugador, con un límite de requests por dominio (token bucket), reintentos con
+backoff exponencial y jitter, y un checkpoint JSONL para retomar si se corta:
+
+    python crawler.py jugadores.txt --workers 8 --rate 4 --pages 3 --checkpoint crawl.jsonl
+
+Las cartas quedan en el cache en disco (SCRAPE_CACHE_DB o --cache-db) que usa
+la API, y opcionalmente en un JSONL con --output.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from browser_pool import BrowserPool
+from cache import ScrapeCache, CACHE_DB_PATH, normalize_player_name
+from cards import CardBatch
+from log_config import get_logger
+from scrapper import (FUTBIN_FETCH_MODE, FUTBIN_MAX_PAGES, build_card_batch,
+                      collect_pages, fetch_page_rows)
+
+logger = get_logger("crawler")
+
+CRAWL_RATE = float(os.getenv("CRAWL_RATE", "2"))         # requests por segundo por dominio
+CRAWL_BURST = int(os.getenv("CRAWL_BURST", "4"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "4"))
+CRAWL_BACKOFF_BASE = float(os.getenv("CRAWL_BACKOFF_BASE", "1"))
+CRAWL_BACKOFF_MAX = float(os.getenv("CRAWL_BACKOFF_MAX", "60"))
+
+
+class TokenBucket:
+    """
+    Permite `rate` requests por segundo en promedio, con ráfagas de hasta `burst`
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Bloquea hasta que haya un token disponible
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class DomainRateLimiter:
+    """
+    Un token bucket por dominio
+    """
+
+    def __init__(self, rate=CRAWL_RATE, burst=CRAWL_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        domain = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def retry_with_backoff(fn, retries=CRAWL_RETRIES, base=CRAWL_BACKOFF_BASE, cap=CRAWL_BACKOFF_MAX,
+                       sleep=time.sleep):
+    """
+    Llama a `fn()` y, si falla, reintenta esperando un tiempo al azar entre 0
+    y base * 2^intento (como mucho `cap`), para que los workers no reintenten
+    todos a la vez
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            logger.warning("Reintentando", extra={"attempt": attempt + 1, "delay": round(delay, 2),
+                                                  "error": str(e)})
+            sleep(delay)
+
+
+class Checkpoint:
+    """
+    Registro JSONL de los jugadores ya procesados, para retomar un crawl cortado.
+    Solo se saltean los que terminaron con cartas ("ok"); los "empty" y
+    "error" se vuelven a intentar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Última línea a medio escribir si el proceso se cortó
+                    if entry.get("status") == "ok":
+                        self.done.add(normalize_player_name(entry["name"]))
+        self._file = open(path, 'a', encoding='utf-8') if path else None
+        self._lock = threading.Lock()
+
+    def is_done(self, name):
+        return normalize_player_name(name) in self.done
+
+    def record(self, name, status, **fields):
+        if self._file is None:
+            return
+        entry = {"name": name, "status": status, "ts": round(time.time(), 3), **fields}
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class Crawler:
+    def __init__(self, workers=4, max_pages=FUTBIN_MAX_PAGES, mode=None, limiter=None,
+                 retries=CRAWL_RETRIES, cache=None, checkpoint=None, output=None):
+        self.workers = workers
+        self.max_pages = max_pages
+        self.mode = mode or FUTBIN_FETCH_MODE
+        self.limiter = limiter or DomainRateLimiter()
+        self.retries = retries
+        self.cache = cache
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.output = output
+        self._output_lock = threading.Lock()
+        # En modo http no hace falta navegador (salvo de respaldo); el pool se crea al primer uso
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = BrowserPool(size=self.workers)
+            return self._pool
+
+    def fetch_page(self, name, page):
+        def fetch():
+            pool = None if self.mode == "http" else self._get_pool()
+            # El limiter se aplica a cada request, también al respaldo con el navegador
+            return fetch_page_rows(name, page, pool, self.mode, before_request=self.limiter.acquire)
+        return retry_with_backoff(fetch, retries=self.retries)
+
+    def crawl_one(self, name):
+        raw = collect_pages(lambda page: self.fetch_page(name, page), self.max_pages)
+        cards = build_card_batch(raw)
+        if len(cards) and self.cache is not None:
+            self.cache.set(name, cards)
+        if self.output is not None:
+            with self._output_lock:
+                for record in cards.to_records():
+                    self.output.write(json.dumps({"query": name, **record}, ensure_ascii=False,
+                                                 default=str) + "\n")
+        return cards
+
+    def run(self, names):
+        """
+        Procesa todos los nombres que no estén en el checkpoint; devuelve un resumen
+        """
+        names = list(dict.fromkeys(name for name in names if name.strip()))
+        pending = [name for name in names if not self.checkpoint.is_done(name)]
+        summary = {"total": len(names), "skipped": len(names) - len(pending), "ok": 0,
+                   "empty": 0, "failed": 0, "cards": 0}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawl") as executor:
+            futures = {executor.submit(self.crawl_one, name): name for name in pending}
+            for i, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    cards = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    self.checkpoint.record(name, "error", error=str(e))
+                    logger.error("Falló el jugador", extra={"player": name, "error": str(e)})
+                else:
+                    if len(cards):
+                        summary["ok"] += 1
+                        summary["cards"] += len(cards)
+                        self.checkpoint.record(name, "ok", cards=len(cards))
+                    else:
+                        # Sin cartas puede ser un timeout de la página: no se da por terminado
+                        summary["empty"] += 1
+                        self.checkpoint.record(name, "empty")
+                if i % 50 == 0:
+                    logger.info("Progreso", extra={"done": i, "pending": len(pending) - i})
+
+        if self._pool is not None:
+            self._pool.close()
+        summary["elapsed_s"] = round(time.perf_counter() - start, 2)
+        return summary
+
+
+def read_names(path, column=None):
+    """
+    Nombres de un .txt (uno por línea) o de una columna de un CSV
+    """
+    if path.endswith('.csv'):
+        data = pd.read_csv(path)
+        column = column or next(col for col in ('name', 'Name', 'player_name') if col in data.columns)
+        return data[column].dropna().astype(str).tolist()
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraping masivo de futbin")
+    parser.add_argument("names", help="Archivo .txt (un nombre por línea) o .csv")
+    parser.add_argument("--column", help="Columna con los nombres si es un CSV")
+    parser.add_argument("--workers", type=int, default=4, help="Jugadores en paralelo")
+    parser.add_argument("--pages", type=int, default=max(FUTBIN_MAX_PAGES, 3),
+                        help="Máximo de páginas de resultados por jugador")
+    parser.add_argument("--rate", type=float, default=CRAWL_RATE, help="Requests por segundo a futbin")
+    parser.add_argument("--burst", type=int, default=CRAWL_BURST)
+    parser.add_argument("--retries", type=int, default=CRAWL_RETRIES)
+    parser.add_argument("--mode", default=None, help="html, http o selenium (FUTBIN_FETCH_MODE)")
+    parser.add_argument("--checkpoint", help="JSONL para retomar (se saltean los ya hechos)")
+    parser.add_argument("--cache-db", default=CACHE_DB_PATH, help="Cache en disco de la API")
+    parser.add_argument("--output", help="JSONL con todas las cartas")
+    args = parser.parse_args()
+
+    cache = (ScrapeCache(db_path=args.cache_db, encode=CardBatch.to_json, decode=CardBatch.from_json)
+             if args.cache_db else None)
+    checkpoint = Checkpoint(args.checkpoint)
+    output = open(args.output, 'a', encoding='utf-8') if args.output else None
+    try:
+        crawler = Crawler(workers=args.workers, max_pages=args.pages, mode=args.mode,
+                          limiter=DomainRateLimiter(args.rate, args.burst), retries=args.retries,
+                          cache=cache, checkpoint=checkpoint, output=output)
+        summary = crawler.run(read_names(args.names, args.column))
+    finally:
+        checkpoint.close()
+        if output is not None:
+            output.close()
+        if cache is not None:
+            cache.close()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+DEBUG_CAPTURE_ENABLED = os.getenv("FIFA_DEBUG_CAPTURE", "0") == "1"
+DEBUG_CAPTURE_SIZE = int(os.getenv("FIFA_DEBUG_CAPTURE_SIZE", "1000"))
+DEBUG_CAPTURE_SAMPLE_RATE = float(os.getenv("FIFA_DEBUG_CAPTURE_SAMPLE_RATE", "0.1"))
+
+
+class FeatureCapture:
+    """
+    Guarda una muestra de los vectores de features preprocesados en un buffer
+    circular en memoria, para depurar sin escribir a disco en cada predicción.
+
+    Desactivado por defecto; se activa con FIFA_DEBUG_CAPTURE=1.
+    """
+
+    def __init__(self, enabled=DEBUG_CAPTURE_ENABLED, size=DEBUG_CAPTURE_SIZE,
+                 sample_rate=DEBUG_CAPTURE_SAMPLE_RATE):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self._rows = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def capture(self, X, predictions=None):
+        """
+        Guarda (muestreando) las filas de X; no hace I/O
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+        now = time.time()
+        X = np.array(X, dtype=np.float32, copy=True)
+        preds = None if predictions is None else np.asarray(predictions, dtype=np.float64)
+        with self._lock:
+            for i in range(len(X)):
+                self._rows.append((now, X[i], None if preds is None else preds[i]))
+
+    def snapshot(self):
+        """
+        Devuelve (timestamps, matriz de features, predicciones) de lo capturado
+        """
+        with self._lock:
+            rows = list(self._rows)
+        if not rows:
+            return np.empty(0), np.empty((0, 0), dtype=np.float32), np.empty(0)
+        timestamps = np.array([r[0] for r in rows])
+        features = np.stack([r[1] for r in rows])
+        predictions = np.array([np.nan if r[2] is None else r[2] for r in rows])
+        return timestamps, features, predictions
+
+    def dump(self, path, feature_columns=None):
+        """
+        Escribe lo capturado a un .npz (se llama a mano, nunca en el hot path)
+        """
+        timestamps, features, predictions = self.snapshot()
+        columns = np.array(feature_columns or [], dtype=str)
+        np.savez_compressed(path, timestamps=timestamps, features=features,
+                            predictions=predictions, feature_columns=columns)
+        return len(timestamps)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+feature_capture = FeatureCapture()
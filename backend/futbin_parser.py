@@ -0,0 +1,171 @@
+"""
+Parser de la página de resultados de futbin a partir del HTML.
+
+Recorre todas las filas en una sola pasada con lxml en lugar de hacer un
+find_element de Selenium por cada campo. iter_player_rows hace lo mismo de
+forma incremental, devolviendo cada fila mientras el HTML todavía se está
+descargando. Se puede probar sin navegador contra un HTML guardado:
+
+    python futbin_parser.py fixtures/futbin_players.html
+"""
+import sys
+import urllib.parse
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml es opcional: sin él se usa el recorrido con Selenium
+    lxml = None
+
+# Columnas que devuelve el parser, las mismas que arma el recorrido con Selenium
+RAW_COLUMNS = ['Name', 'overall_rating', 'Position', 'Side Position', 'price', 'weak_foot',
+               'skill_moves', 'pace', 'shooting', 'passing', 'dribbling', 'defending',
+               'physic', 'Body Type', 'age', 'weight_kg', 'preferred_foot',
+               'club_league_name', 'card', 'link']
+
+# Clase CSS de cada columna de texto
+_TEXT_FIELDS = [
+    ('Name', 'table-player-name'),
+    ('overall_rating', 'player-rating-card-text'),
+    ('Position', 'table-pos-main'),
+    ('price', 'price'),
+    ('weak_foot', 'table-weak-foot'),
+    ('card', 'table-player-revision'),
+    ('skill_moves', 'table-skills'),
+    ('pace', 'table-key-stats'),
+    ('shooting', 'table-shooting'),
+    ('passing', 'table-passing'),
+    ('dribbling', 'table-dribbling'),
+    ('defending', 'table-defending'),
+    ('physic', 'table-physicality'),
+    ('Body Type', 'table-height'),
+    ('age', 'table-age'),
+    ('weight_kg', 'table-weight'),
+]
+
+
+class FutbinParseError(Exception):
+    """
+    El HTML no tiene la estructura esperada
+    """
+
+
+def parser_available():
+    return lxml is not None
+
+
+def _class_xpath(cls):
+    return f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+# XPaths compilados una sola vez
+_XPATHS = {}
+
+
+def _find(element, cls):
+    xpath = _XPATHS.get(cls)
+    if xpath is None:
+        xpath = _XPATHS[cls] = lxml.etree.XPath(_class_xpath(cls))
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _text(element):
+    # Igual que el .text de Selenium: espacios colapsados
+    return " ".join("".join(element.itertext()).split())
+
+
+def _parse_row(row, base_url):
+    """
+    Datos crudos de una fila 'player-row' (un valor por cada columna de RAW_COLUMNS)
+    """
+    values = {}
+    # Primer link que apunte a un jugador
+    values['link'] = None
+    for anchor in row.iter('a'):
+        href = anchor.get('href')
+        if href and 'player' in href.lower():
+            values['link'] = urllib.parse.urljoin(base_url, href)
+            break
+
+    for col, cls in _TEXT_FIELDS:
+        element = _find(row, cls)
+        if element is None:
+            raise FutbinParseError(f"Fila sin '{cls}'")
+        values[col] = _text(element)
+
+    side = _find(row, 'table-pos')
+    side = _find(side, 'text-faded') if side is not None else None
+    values['Side Position'] = _text(side) if side is not None else ''
+
+    league = _find(row, 'table-player-league')
+    league_img = next(league.iter('img'), None) if league is not None else None
+    if league_img is None:
+        raise FutbinParseError("Fila sin liga")
+    values['club_league_name'] = league_img.get('title')
+
+    foot = _find(row, 'table-foot')
+    foot_img = next(foot.iter('img'), None) if foot is not None else None
+    if foot_img is None:
+        raise FutbinParseError("Fila sin pie hábil")
+    values['preferred_foot'] = 'Right' if 'right' in (foot_img.get('src') or '').lower() else 'Left'
+    return values
+
+
+def rows_to_columns(rows):
+    """
+    Lista de filas crudas -> dict columna -> lista
+    """
+    return {col: [row[col] for row in rows] for col in RAW_COLUMNS}
+
+
+def parse_player_rows(html, base_url="https://www.futbin.com"):
+    """
+    Devuelve un dict columna -> lista con los datos de cada 'player-row'
+    """
+    if lxml is None:
+        raise FutbinParseError("lxml no está instalado")
+
+    try:
+        document = lxml.html.fromstring(html, base_url=base_url)
+    except (ValueError, lxml.etree.ParserError) as e:
+        raise FutbinParseError(f"HTML inválido: {e}")
+
+    return rows_to_columns([_parse_row(row, base_url)
+                            for row in document.xpath(_class_xpath('player-row'))])
+
+
+def iter_player_rows(chunks, base_url="https://www.futbin.com"):
+    """
+    Parsea el HTML a medida que llega (iterable de bytes o str) y devuelve
+    cada fila apenas se cierra su tag, sin esperar el resto de la página
+    """
+    if lxml is None:
+        raise FutbinParseError("lxml no está instalado")
+
+    parser = lxml.etree.HTMLPullParser(events=('end',))
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from _completed_rows(parser, base_url)
+        parser.close()
+    except lxml.etree.ParserError as e:
+        raise FutbinParseError(f"HTML inválido: {e}")
+    yield from _completed_rows(parser, base_url)
+
+
+def _completed_rows(parser, base_url):
+    for _, element in parser.read_events():
+        if 'player-row' in (element.get('class') or '').split():
+            yield _parse_row(element, base_url)
+            # Lo ya procesado no hace falta mantenerlo en memoria
+            element.clear(keep_tail=True)
+
+
+if __name__ == "__main__":
+    import json
+    from scrapper import build_card_batch
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        batch = build_card_batch(parse_player_rows(f.read()))
+    print(json.dumps(batch.to_records(), indent=2, ensure_ascii=False))
@@ -0,0 +1,73 @@
+"""
+Validadores HTTP (ETag / Last-Modified) y respuestas 304.
+
+Lo usan el index.html del frontend y /predict, que toma el max-age del cache
+de scraping: mientras la entrada está fresca el navegador puede reutilizar la
+respuesta, y después revalida con If-None-Match.
+"""
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+import orjson
+from fastapi import Response
+
+
+def make_etag(content):
+    return '"' + hashlib.blake2b(content, digest_size=12).hexdigest() + '"'
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # Comparación débil: W/"x" y "x" son el mismo recurso
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def is_not_modified(request_headers, etag=None, last_modified=None):
+    """
+    True si el cliente ya tiene esta versión (If-None-Match o, si no viene,
+    If-Modified-Since contra `last_modified` en segundos)
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified_response(headers):
+    return Response(status_code=304, headers=headers)
+
+
+def json_response(content):
+    """
+    JSON serializado con orjson (acepta arrays y escalares de numpy)
+    """
+    body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(content=body, media_type="application/json")
+
+
+def cached_json_response(request_headers, content, max_age):
+    """
+    JSON con ETag y Cache-Control; 304 sin cuerpo si el cliente ya lo tiene
+    """
+    body = orjson.dumps(content)
+    etag = make_etag(body)
+    headers = {
+        "ETag": etag,
+        # Sin tiempo fresco (entrada vieja o sin cache) el cliente revalida siempre
+        "Cache-Control": f"public, max-age={int(max_age)}" if max_age >= 1 else "no-cache",
+    }
+    if is_not_modified(request_headers, etag):
+        return not_modified_response(headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,208 @@
+"""
+Inferencia directa con el booster de XGBoost, sin pasar por el Pipeline de sklearn.
+
+El modelo entrenado es Pipeline(StandardScaler, XGBRegressor). Cada predict
+del Pipeline valida la entrada, copia el DataFrame, escala y arma la entrada
+del booster; para los pocos registros de un /predict eso pesa más que los
+árboles. Hay dos motores equivalentes:
+
+    scaled  escala con arrays precalculados y llama a inplace_predict
+    folded  incorpora el escalado en los umbrales de los árboles: predice
+            directo sobre la matriz float32 sin ninguna pasada previa
+
+Se elige con FIFA_MODEL_ENGINE (scaled por defecto; pipeline deja el modelo
+como está). La paridad con el Pipeline se verifica con
+benchmarks/engine_parity.py.
+"""
+import json
+import os
+
+import numpy as np
+import xgboost as xgb
+
+MODEL_ENGINE = os.getenv("FIFA_MODEL_ENGINE", "scaled")
+ENGINES = ("pipeline", "scaled", "folded")
+
+
+class ScaledBoosterModel:
+    """
+    Reemplazo del Pipeline(StandardScaler, XGBRegressor) usando el booster nativo.
+
+    Escala en float64 (como al entrenar) y predice con inplace_predict sobre
+    un buffer float32 contiguo, sin la validación de sklearn ni un DMatrix.
+    """
+
+    native = True
+
+    def __init__(self, booster, mean, scale):
+        self.booster = booster
+        self.mean = mean
+        self.scale = scale
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        scaled = np.ascontiguousarray((X - self.mean) / self.scale, dtype=np.float32)
+        return self.booster.inplace_predict(scaled)
+
+
+class FoldedBoosterModel:
+    """
+    Booster con el escalado ya incorporado en los umbrales (ver fold_scaler)
+    """
+
+    native = True
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, X):
+        return self.booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+
+
+def fitted_booster(regressor):
+    """
+    Booster de un XGBRegressor entrenado, recortado a best_iteration si hubo
+    early stopping (igual que hace XGBRegressor.predict)
+    """
+    booster = regressor.get_booster()
+    best_iteration = getattr(regressor, 'best_iteration', None)
+    if best_iteration is not None and best_iteration + 1 < booster.num_boosted_rounds():
+        booster = booster[:best_iteration + 1]
+    return booster
+
+
+# Hiperparámetros que definen cómo crece cada árbol; se guardan en el manifest
+# para poder seguir entrenando un modelo igual (train.py --warm-start)
+TRAINING_PARAMS = ('learning_rate', 'max_depth', 'min_child_weight', 'subsample', 'colsample_bytree',
+                   'gamma', 'reg_alpha', 'reg_lambda')
+
+
+def regressor_params(regressor):
+    """
+    Hiperparámetros de un XGBRegressor entrenado.
+
+    Se leen los atributos (get_params falla con pickles de otras versiones de
+    XGBoost) y no save_config(), que en un booster cargado desde archivo
+    devuelve los valores por defecto.
+    """
+    params = {}
+    for name in TRAINING_PARAMS:
+        value = getattr(regressor, name, None)
+        if value is not None:
+            params[name] = value.item() if hasattr(value, 'item') else value
+    return params
+
+
+def training_params(components):
+    """
+    Hiperparámetros del modelo: del manifest del artefacto o del regresor del Pipeline
+    """
+    params = components.get('training_params')
+    if params:
+        return dict(params)
+    model = components.get('pipeline', components.get('model'))
+    regressor = getattr(model, 'named_steps', {}).get('regressor')
+    return regressor_params(regressor) if regressor is not None else {}
+
+
+def _ordered(bits):
+    # float32 -> entero con el mismo orden (para buscar entre floats consecutivos)
+    bits = bits.astype(np.int64)
+    return np.where(bits < 0, -(bits & 0x7FFFFFFF), bits)
+
+
+def _from_ordered(keys):
+    bits = np.where(keys < 0, (-keys) | -0x80000000, keys).astype(np.int32)
+    return bits.view(np.float32)
+
+
+def raw_thresholds(thresholds, mean, scale):
+    """
+    Para cada umbral t sobre el valor escalado, el menor float32 x tal que
+    float32((x - mean) / scale) >= t.
+
+    Escalar es monótono, así que `escalado(x) < t` equivale exactamente a
+    `x < umbral crudo` para cualquier float32, incluso en los valores que caen
+    justo sobre un corte. Se busca por bisección entre los float32 ordenados.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float32)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def reaches(keys):
+        x = _from_ordered(keys).astype(np.float64)
+        # En los extremos del rango el valor escalado no entra en float32 (da ±inf, que está bien)
+        with np.errstate(over='ignore'):
+            return ((x - mean) / scale).astype(np.float32) >= thresholds
+
+    finite = np.finfo(np.float32).max
+    low = np.full(len(thresholds), _ordered(np.array([-finite], dtype=np.float32).view(np.int32))[0])
+    high = np.full(len(thresholds), _ordered(np.array([finite], dtype=np.float32).view(np.int32))[0])
+    # Invariante: reaches(high) es verdadero y reaches(low - 1) falso
+    always = reaches(low)
+    never = ~reaches(high)
+    while True:
+        open_ = (high > low) & ~always & ~never
+        if not open_.any():
+            break
+        mid = (low + high) // 2
+        ok = reaches(mid)
+        high = np.where(open_ & ok, mid, high)
+        low = np.where(open_ & ~ok, mid + 1, low)
+
+    result = _from_ordered(high)
+    result = np.where(always, np.float32(-np.inf), result)
+    return np.where(never, np.float32(np.inf), result)
+
+
+def fold_scaler(booster, mean, scale):
+    """
+    Devuelve una copia del booster que recibe features sin escalar: cada
+    umbral se pasa a la escala original con raw_thresholds
+    """
+    model = json.loads(booster.save_raw(raw_format="json"))
+    trees = model["learner"]["gradient_booster"]["model"]["trees"]
+
+    features, thresholds, locations = [], [], []
+    for t, tree in enumerate(trees):
+        for node, (left, feature) in enumerate(zip(tree["left_children"], tree["split_indices"])):
+            if left != -1:  # las hojas guardan su valor en split_conditions
+                features.append(feature)
+                thresholds.append(tree["split_conditions"][node])
+                locations.append((t, node))
+
+    features = np.asarray(features, dtype=np.int64)
+    folded = raw_thresholds(thresholds, np.asarray(mean)[features], np.asarray(scale)[features])
+    for (t, node), value in zip(locations, folded.tolist()):
+        trees[t]["split_conditions"][node] = value
+
+    result = xgb.Booster()
+    result.load_model(bytearray(json.dumps(model), "utf-8"))
+    result.set_param({"nthread": int(booster.attributes().get("nthread", 0)) or os.cpu_count() or 1})
+    return result
+
+
+def native_model(model, engine=MODEL_ENGINE):
+    """
+    Convierte un Pipeline(StandardScaler, XGBRegressor) (o un ScaledBoosterModel)
+    al motor pedido. Si el modelo no tiene esa forma se devuelve tal cual.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine} (opciones: {', '.join(ENGINES)})")
+    if engine == "pipeline":
+        return model
+
+    if isinstance(model, ScaledBoosterModel):
+        scaled = model
+    else:
+        steps = getattr(model, 'named_steps', {})
+        scaler, regressor = steps.get('scaler'), steps.get('regressor')
+        if scaler is None or regressor is None or not hasattr(regressor, 'get_booster') \
+                or not getattr(scaler, 'with_mean', False) or not getattr(scaler, 'with_std', False):
+            return model
+        scaled = ScaledBoosterModel(fitted_booster(regressor), np.asarray(scaler.mean_, dtype=np.float64),
+                                    np.asarray(scaler.scale_, dtype=np.float64))
+
+    if engine == "folded":
+        return FoldedBoosterModel(fold_scaler(scaled.booster, scaled.mean, scaled.scale))
+    return scaled
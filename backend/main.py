@@ -1,14 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+from contextlib import asynccontextmanager
+import os
+import orjson
+from fastapi import FastAPI, Header, Request
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
-from model_utils import load_model_components, predict_new_data
-from scrapper import get_player_data_from_futbin
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from model_utils import band_columns, predict_new_data, predict_prices
+from cards import CardBatch
+from model_registry import ModelRegistry, reloadable_path
+from scrapper import get_player_data_from_futbin, iter_player_cards
+from browser_pool import close_browser_pool, BrowserPoolTimeout
+from cache import ScrapeCache, normalize_player_name
+from player_index import load_player_index
+from singleflight import SharedResults, SingleFlight
+from workers import (AdmissionController, Overloaded, run_in_pool, iterate_in_pool, scrape_executor,
+                     inference_executor, shutdown_executors, SCRAPE_TIMEOUT, SCRAPE_WORKERS,
+                     INFERENCE_TIMEOUT, RETRY_AFTER_SECONDS)
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from log_config import get_logger
+from debug_capture import DEBUG_CAPTURE_SIZE, feature_capture
+from tracing import start_trace, end_trace, stage, render_metrics, metric_lines, REQUEST_DURATION, REQUESTS_TOTAL
+from profiler import slow_request_profiler
+from http_cache import cached_json_response, json_response
+from static_files import IndexHtml, PrecompressedStaticFiles
 
-app = FastAPI()
+logger = get_logger("main")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # El modelo se carga en segundo plano, sin demorar el arranque
+    asyncio.get_running_loop().run_in_executor(inference_executor, model_registry.get)
+    model_registry.start_watching()
+    try:
+        yield
+    finally:
+        # Cerrar los navegadores del pool y los workers al apagar el servidor
+        model_registry.stop_watching()
+        shutdown_executors()
+        close_browser_pool()
+        scrape_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,11 +57,414 @@ app.add_middleware(
 )
 
 
+# Tiempos por etapa de cada request: header Server-Timing, histogramas en
+# /metrics y perfil de los requests lentos (FIFA_PROFILE_SLOW_MS)
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    trace, token = start_trace()
+    profile = slow_request_profiler.start()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing()
+        return response
+    finally:
+        end_trace(token)
+        elapsed = trace.elapsed()
+        # Se etiqueta con la ruta declarada (no la URL) para no crear una serie por jugador
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REQUEST_DURATION.observe(elapsed, path)
+        REQUESTS_TOTAL.inc(path, str(status))
+        if profile is not None:
+            # Guardar el perfil escribe a disco: se hace fuera del event loop
+            asyncio.get_running_loop().run_in_executor(None, slow_request_profiler.finish,
+                                                       profile, elapsed, request.url.path)
+
+
 @app.get("/api/data")
 async def get_data():
     return {"mensaje": "¡Hola desde la API!"}
 # ...
 
+# El modelo se carga en segundo plano al iniciar (artefacto si existe, si no el pickle)
+# y se puede recargar en caliente con /admin/reload o con FIFA_MODEL_WATCH_INTERVAL
+model_registry = ModelRegistry()
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Entrada esperada
+class PlayerNameRequest(BaseModel):
+    player_name: str
+    # Con live=True se ignora el índice local y se scrapea futbin (precios reales)
+    live: bool = False
+
+
+MAX_BATCH_NAMES = 50
+MAX_BATCH_ROWS = 10000
+# Nombres de un mismo batch que se scrapean a la vez (más no avanza: es el tamaño del pool)
+BATCH_NAME_CONCURRENCY = SCRAPE_WORKERS
+
+
+class BatchPredictRequest(BaseModel):
+    player_names: list[str] = []
+    rows: list[dict] = []
+
+admission = AdmissionController()
+scrape_cache = ScrapeCache(encode=CardBatch.to_json, decode=CardBatch.from_json)
+inflight_predictions = SingleFlight()
+# Scrapes en streaming en curso (/predict/stream): los demás esperan sus cartas
+inflight_streams = SharedResults()
+
+# Predicciones precalculadas de la base local (python player_index.py build ...)
+player_index = load_player_index()
+MAX_SEARCH_RESULTS = 50
+
+
+def error_response(message, status_code, retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return JSONResponse(status_code=status_code, content={"error": message}, headers=headers)
+
+
+def predict_cards(cards):
+    """
+    Corre el modelo sobre las cartas scrapeadas (CardBatch) y arma la respuesta
+    """
+    predictions, bands = predict_prices(cards.columns, model_registry.get(), return_bands=True)
+    return cards.to_records(predictions, bands)
+
+
+def index_lookup(player_name):
+    """
+    Cartas del jugador desde el índice local, o None si no está o si el
+    índice se armó con otro modelo que el activo.
+
+    Solo con el nombre completo exacto: un prefijo trae jugadores que no son
+    el buscado, y el índice no tiene precio ni versiones de carta de futbin
+    """
+    if player_index is None:
+        return None
+    if player_index.info.get("model_version") != model_registry.info()["version"]:
+        return None
+    rows = player_index.exact_rows(player_name)[:MAX_SEARCH_RESULTS]
+    return player_index.records(rows) if rows else None
+
+
+async def predict_player(player_name):
+    """
+    Scrapea (o lee del cache) y predice las cartas de un jugador. No pasa por
+    admission: lo llama quien ya tiene su lugar
+    """
+    # Buscar primero en el cache; si la entrada está vieja se sirve igual
+    # y se refresca en segundo plano
+    with stage("cache_lookup"):
+        cards, state = scrape_cache.get(player_name)
+    if state == "stale":
+        scrape_cache.refresh_in_background(player_name,
+                                           get_player_data_from_futbin, scrape_executor)
+    if cards is None:
+        # Si un /predict/stream ya está scrapeando este jugador se esperan sus cartas
+        cards = await inflight_streams.wait(normalize_player_name(player_name))
+    if cards is None:
+        # Obtener datos del scraping en el pool de scraping
+        cards = await run_in_pool(scrape_executor, SCRAPE_TIMEOUT,
+                                        scrape_cache.fetch_and_store,
+                                        player_name, get_player_data_from_futbin)
+
+    if not cards:
+        return {"error": "No se encontraron cartas para ese jugador"}
+
+    # Predecir en el pool de inferencia
+    return await run_in_pool(inference_executor, INFERENCE_TIMEOUT,
+                             predict_cards, cards)
+
+
+async def scrape_and_predict(player_name):
+    """
+    Como predict_player, ocupando un lugar en admission mientras dura
+    """
+    with admission:
+        return await predict_player(player_name)
+
+
+async def predict_response(player_name, live, request_headers):
+    """
+    Respuesta de /predict con ETag y Cache-Control atados al cache de scraping:
+    el navegador la reutiliza mientras la entrada siga fresca y después
+    revalida (304 si las predicciones no cambiaron)
+    """
+    if model_registry.failed:
+        return {"error": "Modelo no cargado"}
+
+    # Jugadores de la base local: se responde desde el índice sin scrapear
+    if not live:
+        with stage("index_lookup"):
+            records = index_lookup(player_name)
+        if records is not None:
+            with stage("serialize"):
+                return cached_json_response(request_headers, records, scrape_cache.ttl)
+
+    # Los requests simultáneos por el mismo jugador comparten un único
+    # scrape y una única predicción
+    key = normalize_player_name(player_name)
+    try:
+        result = await inflight_predictions.do(key, lambda: scrape_and_predict(player_name))
+        with stage("serialize"):
+            if isinstance(result, dict):  # {"error": ...}: no se cachea
+                return json_response(result)
+            return cached_json_response(request_headers, result, scrape_cache.fresh_for(player_name))
+    except Overloaded as e:
+        return error_response("Servidor ocupado, intente de nuevo más tarde", 429, e.retry_after)
+    except BrowserPoolTimeout:
+        return error_response("No hay navegadores disponibles, intente de nuevo más tarde", 503, RETRY_AFTER_SECONDS)
+    except asyncio.TimeoutError:
+        return error_response("La búsqueda tardó demasiado", 504)
+
+
+@app.post("/predict")
+async def predict_from_name(request: PlayerNameRequest, http_request: Request):
+    return await predict_response(request.player_name, request.live, http_request.headers)
+
+
+# Misma respuesta por GET, para que el navegador y los proxies puedan usar
+# el Cache-Control (las respuestas a un POST no se guardan)
+@app.get("/predict")
+async def predict_from_query(http_request: Request, player_name: str, live: bool = False):
+    return await predict_response(player_name, live, http_request.headers)
+
+
+def scrape_cards_and_store(player_name):
+    """
+    Cartas de futbin en tandas; al terminar se guardan juntas en el cache
+    """
+    batches = []
+    for batch in iter_player_cards(player_name):
+        batches.append(batch)
+        yield batch
+    if batches:
+        scrape_cache.set(player_name, CardBatch.concat(batches))
+
+
+def ndjson_lines(records):
+    return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+async def stream_predictions(player_name):
+    """
+    Predice las cartas de un jugador y las va devolviendo como líneas NDJSON
+    apenas se predice cada tanda. Los errores van como una línea {"error": ...}
+    """
+    try:
+        with admission:
+            with stage("cache_lookup"):
+                cards, state = scrape_cache.get(player_name)
+            if state == "stale":
+                scrape_cache.refresh_in_background(player_name,
+                                                   get_player_data_from_futbin, scrape_executor)
+
+            # Si alguien ya está scrapeando este jugador no se lanza otro scrape
+            key = normalize_player_name(player_name)
+            while cards is None and inflight_streams.running(key):
+                # Otro stream: se esperan sus cartas (None si se cortó sin terminar)
+                cards = await inflight_streams.wait(key)
+            if cards is None and inflight_predictions.running(key):
+                # Un /predict: se comparte su predicción
+                result = await inflight_predictions.do(key, lambda: predict_player(player_name))
+                yield ndjson_lines([result] if isinstance(result, dict) else result)
+                return
+
+            if cards is not None:
+                if not cards:
+                    yield ndjson_lines([{"error": "No se encontraron cartas para ese jugador"}])
+                    return
+                records = await run_in_pool(inference_executor, INFERENCE_TIMEOUT, predict_cards, cards)
+                yield ndjson_lines(records)
+                return
+
+            with inflight_streams.lead(key) as shared:
+                batches = []
+                async for batch in iterate_in_pool(scrape_executor, SCRAPE_TIMEOUT,
+                                                   scrape_cards_and_store, player_name):
+                    batches.append(batch)
+                    records = await run_in_pool(inference_executor, INFERENCE_TIMEOUT, predict_cards, batch)
+                    yield ndjson_lines(records)
+                shared.set_result(CardBatch.concat(batches))
+            if not batches:
+                yield ndjson_lines([{"error": "No se encontraron cartas para ese jugador"}])
+    except Overloaded:
+        yield ndjson_lines([{"error": "Servidor ocupado, intente de nuevo más tarde"}])
+    except BrowserPoolTimeout:
+        yield ndjson_lines([{"error": "No hay navegadores disponibles, intente de nuevo más tarde"}])
+    except asyncio.TimeoutError:
+        yield ndjson_lines([{"error": "La búsqueda tardó demasiado"}])
+    except Exception:
+        logger.exception("Error en /predict/stream", extra={"player": player_name})
+        yield ndjson_lines([{"error": "Error al obtener las cartas"}])
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: PlayerNameRequest):
+    """
+    Igual que /predict, pero en NDJSON (una carta por línea) a medida que se
+    predicen, para que el frontend muestre las filas sin esperar la página entera
+    """
+    if model_registry.failed:
+        return error_response("Modelo no cargado", 503)
+
+    if not request.live:
+        with stage("index_lookup"):
+            records = index_lookup(request.player_name)
+        if records is not None:
+            return StreamingResponse(iter([ndjson_lines(records)]), media_type="application/x-ndjson")
+
+    # Se rechaza antes de empezar a responder, mientras todavía se puede mandar un 429
+    if admission.full():
+        return error_response("Servidor ocupado, intente de nuevo más tarde", 429, RETRY_AFTER_SECONDS)
+    return StreamingResponse(stream_predictions(request.player_name), media_type="application/x-ndjson")
+
+
+def predict_rows(rows):
+    """
+    Predice filas de features crudas (mismas columnas que el scraping)
+    """
+    predictions = predict_new_data(pd.DataFrame(rows), model_registry.get())
+    for col in ["predicted_price"] + band_columns(model_registry.get()):
+        predictions[col] = predictions[col].astype(float).round(2)
+    return predictions.to_dict(orient="records")
+
+
+async def predict_name_for_batch(player_name, limit):
+    key = normalize_player_name(player_name)
+    try:
+        async with limit:
+            return await inflight_predictions.do(key, lambda: predict_player(player_name))
+    except BrowserPoolTimeout:
+        return {"error": "No hay navegadores disponibles, intente de nuevo más tarde"}
+    except asyncio.TimeoutError:
+        return {"error": "La búsqueda tardó demasiado"}
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: BatchPredictRequest):
+    """
+    Predice varios jugadores por nombre y/o filas de features en un solo request
+    """
+    if model_registry.failed:
+        return {"error": "Modelo no cargado"}
+    if len(request.player_names) > MAX_BATCH_NAMES or len(request.rows) > MAX_BATCH_ROWS:
+        return error_response(f"Máximo {MAX_BATCH_NAMES} nombres y {MAX_BATCH_ROWS} filas por request", 413)
+
+    result = {}
+    if request.player_names:
+        names = list(dict.fromkeys(request.player_names))
+        try:
+            # El batch ocupa un solo lugar en admission y scrapea sus nombres de a
+            # BATCH_NAME_CONCURRENCY, así no rechaza sus propios nombres
+            with admission:
+                limit = asyncio.Semaphore(BATCH_NAME_CONCURRENCY)
+                predictions = await asyncio.gather(*(predict_name_for_batch(name, limit) for name in names))
+        except Overloaded as e:
+            return error_response("Servidor ocupado, intente de nuevo más tarde", 429, e.retry_after)
+        result["players"] = dict(zip(names, predictions))
+    if request.rows:
+        try:
+            result["rows"] = await run_in_pool(inference_executor, INFERENCE_TIMEOUT,
+                                               predict_rows, request.rows)
+        except asyncio.TimeoutError:
+            return error_response("La predicción tardó demasiado", 504)
+    return json_response(result)
+
+
+@app.get("/search")
+async def search_players(q: str, limit: int = 10):
+    """
+    Búsqueda por nombre (prefijos o aproximada) en el índice local
+    """
+    if player_index is None:
+        return error_response("Índice de jugadores no disponible", 404)
+    return json_response(player_index.search(q, max(1, min(limit, MAX_SEARCH_RESULTS))))
+
+
+def admin_authorized(token):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+@app.get("/debug/features")
+async def debug_features(limit: int = 100, x_admin_token: str = Header(default="")):
+    """
+    Últimos vectores de features capturados (requiere FIFA_DEBUG_CAPTURE=1 y ADMIN_TOKEN)
+    """
+    if not admin_authorized(x_admin_token):
+        return error_response("No autorizado", 403)
+    if not feature_capture.enabled:
+        return JSONResponse(status_code=404, content={"error": "Captura de debug desactivada"})
+    limit = max(1, min(limit, DEBUG_CAPTURE_SIZE))
+    timestamps, features, predictions = feature_capture.snapshot()
+    components = model_registry.get()
+    columns = components['feature_columns'] if components else []
+    return [
+        {"ts": float(ts), "features": dict(zip(columns, row.tolist())),
+         "predicted_price": None if np.isnan(pred) else float(pred)}
+        for ts, row, pred in zip(timestamps[-limit:], features[-limit:], predictions[-limit:])
+    ]
+
+
+class ReloadRequest(BaseModel):
+    # Directorio de artefacto dentro de backend/model_artifact o backend/artifacts
+    path: str | None = None
+
+
+@app.post("/admin/reload")
+async def reload_model(request: ReloadRequest, x_admin_token: str = Header(default="")):
+    """
+    Recarga el modelo de este worker sin cortar requests (requiere ADMIN_TOKEN).
+
+    Con varios workers de uvicorn cada uno tiene su modelo; para cambiarlo en
+    todos conviene usar FIFA_MODEL_WATCH_INTERVAL y reemplazar el artefacto.
+    """
+    if not admin_authorized(x_admin_token):
+        return error_response("No autorizado", 403)
+    path = None
+    if request.path:
+        path = reloadable_path(request.path)
+        if path is None:
+            return error_response("Solo se pueden cargar artefactos de backend/model_artifact "
+                                  "o backend/artifacts", 400)
+    reloaded = await run_in_pool(inference_executor, None, model_registry.reload, path)
+    if not reloaded:
+        return error_response("No se pudo cargar el modelo, se mantiene el anterior", 500)
+    return model_registry.info()
+
+
+@app.get("/admin/model")
+async def model_info():
+    return model_registry.info()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    stats = scrape_cache.get_stats()
+    stats["coalesced"] = dict(inflight_predictions.stats)
+    stats["coalesced_streams"] = dict(inflight_streams.stats)
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Métricas en formato de texto de Prometheus
+    """
+    stats = scrape_cache.get_stats()
+    extra = []
+    extra += metric_lines("fifa_cache_hit_rate", "Proporción de aciertos del cache de scraping", stats["hit_rate"])
+    extra += metric_lines("fifa_cache_entries", "Entradas en memoria del cache de scraping", stats["entries"])
+    extra += metric_lines("fifa_requests_in_flight", "Predicciones en curso", admission.in_flight)
+    extra += metric_lines("fifa_coalesced_requests_total", "Requests que esperaron un scrape en curso",
+                          inflight_predictions.stats["followers"] + inflight_streams.stats["followers"],
+                          kind="counter")
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
+
 # --- Parte para servir el frontend ---
 
 # Define dónde está la carpeta 'build' de tu frontend
@@ -32,51 +473,23 @@ FRONTEND_BUILD_DIR = Path(__file__).parent.parent / "frontend" / "build"
 
 # Verificación
 if not FRONTEND_BUILD_DIR.is_dir():
-    print(f"Advertencia: La carpeta 'frontend/build' no se encontró en: {FRONTEND_BUILD_DIR}")
-    print("Asegúrate de haber ejecutado 'npm run build' en tu frontend.")
+    logger.warning("La carpeta 'frontend/build' no se encontró. Asegúrate de haber ejecutado 'npm run build' en tu frontend.",
+                   extra={"path": str(FRONTEND_BUILD_DIR)})
     # raise Exception(...) # Podrías lanzar un error aquí si es crítico
 
 # Monta los archivos estáticos. Cualquier solicitud a /static/ se buscará en FRONTEND_BUILD_DIR/static
 # (React suele poner sus assets en /static/ dentro de la carpeta build)
-app.mount("/static", StaticFiles(directory=FRONTEND_BUILD_DIR / "static"), name="static")
+# Si existen, se sirven las variantes .br/.gz que genera static_files.py después del build
+app.mount("/static", PrecompressedStaticFiles(directory=FRONTEND_BUILD_DIR / "static"), name="static")
+
+# El index.html se guarda en memoria y se vuelve a leer solo si cambia el archivo
+index_html = IndexHtml(FRONTEND_BUILD_DIR / "index.html")
 
 # Ruta "comodín": Para cualquier otra dirección, sirve el index.html de React
 @app.get("/{full_path:path}", response_class=HTMLResponse)
-async def serve_frontend(full_path: str):
-    index_html_path = FRONTEND_BUILD_DIR / "index.html"
-    if not index_html_path.is_file():
-        print(f"Advertencia: index.html no se encontró en: {index_html_path}")
+async def serve_frontend(full_path: str, request: Request):
+    response = index_html.response(request.headers)
+    if response is None:
+        logger.warning("index.html no se encontró", extra={"path": str(index_html.path)})
         return HTMLResponse(content="<h1>Frontend no encontrado</h1><p>Asegúrate de que index.html esté en la carpeta frontend/build.</p>", status_code=404)
-    with open(index_html_path, "r") as f:
-        return HTMLResponse(content=f.read())
-
-# Cargar componentes del modelo
-model_components = load_model_components("fifa_model.pkl")
-
-# Entrada esperada
-class PlayerNameRequest(BaseModel):
-    player_name: str
-
-@app.post("/predict")
-def predict_from_name(request: PlayerNameRequest):
-    if model_components is None:
-        return {"error": "Modelo no cargado"}
-
-    # Obtener datos del scraping
-    raw_payload = get_player_data_from_futbin(request.player_name)
-
-    if not raw_payload:
-        return {"error": "No se encontraron cartas para ese jugador"}
-
-    # Separar features y meta
-    features_df = pd.DataFrame([p["features"] for p in raw_payload])
-    meta_df = pd.DataFrame([p["meta"] for p in raw_payload])
-
-    # Predecir
-    predictions = predict_new_data(features_df, model_components)
-   
-    # Combinar todo
-    full_df = predictions.merge(meta_df, on="player_id")
-    full_df["predicted_price"] =  full_df["predicted_price"].astype(float).round(2)
-
-    return full_df.to_dict(orient="records")
+    return response
@@ -0,0 +1,188 @@
+"""
+Formato de artefacto del modelo, versionado y rápido de cargar.
+
+Un artefacto es un directorio con:
+
+    manifest.json     metadatos, vocabularios de los encoders, cuantiles (si el
+                      modelo los predice) y sha256 de cada archivo
+    booster.ubj       booster nativo de XGBoost
+    scaler_mean.npy   media del StandardScaler
+    scaler_scale.npy  desvío del StandardScaler
+
+No usa pickle, así que cargarlo no ejecuta código ni depende de la versión de
+scikit-learn con la que se entrenó. Para generarlo desde el pickle actual:
+
+    python model_artifact.py export fifa_model.pkl model_artifact
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+
+from inference_engine import ScaledBoosterModel, fitted_booster, training_params
+from log_config import get_logger
+
+logger = get_logger("artifact")
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+BOOSTER_FILE = "booster.ubj"
+SCALER_MEAN_FILE = "scaler_mean.npy"
+SCALER_SCALE_FILE = "scaler_scale.npy"
+
+
+class ArtifactError(Exception):
+    """
+    El artefacto está incompleto, corrupto o es de un formato no soportado
+    """
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_artifact(components, out_dir):
+    """
+    Escribe los componentes del pickle (o los que arma train.py) como artefacto en `out_dir`.
+
+    Se escribe en un directorio temporal al lado y se renombra al final, así
+    quien esté mirando `out_dir` nunca ve un artefacto a medio escribir.
+    """
+    from model_utils import _onehot_categories, _position_classes, _training_medians
+
+    # Con FIFA_MODEL_ENGINE el modelo cargado ya no es el Pipeline: se usa el original
+    model = components.get('pipeline', components['model'])
+    if isinstance(model, ScaledBoosterModel):
+        booster, mean, scale = model.booster, model.mean, model.scale
+    else:
+        scaler = model.named_steps['scaler']
+        booster, mean, scale = fitted_booster(model.named_steps['regressor']), scaler.mean_, scaler.scale_
+
+    out_dir = os.path.abspath(out_dir)
+    parent = os.path.dirname(out_dir)
+    tmp_dir = tempfile.mkdtemp(prefix=".artifact-", dir=parent)
+    os.chmod(tmp_dir, 0o755)
+    try:
+        booster.save_model(os.path.join(tmp_dir, BOOSTER_FILE))
+        np.save(os.path.join(tmp_dir, SCALER_MEAN_FILE), np.asarray(mean, dtype=np.float64))
+        np.save(os.path.join(tmp_dir, SCALER_SCALE_FILE), np.asarray(scale, dtype=np.float64))
+
+        files = {}
+        for name in (BOOSTER_FILE, SCALER_MEAN_FILE, SCALER_SCALE_FILE):
+            path = os.path.join(tmp_dir, name)
+            files[name] = {"sha256": _sha256(path), "bytes": os.path.getsize(path)}
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "model_version": files[BOOSTER_FILE]["sha256"][:12],
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "model_type": components.get('model_type'),
+            "target_col": components['target_col'],
+            "feature_columns": list(components['feature_columns']),
+            "onehot_categories": {col: [str(c) for c in cats]
+                                  for col, cats in _onehot_categories(components).items()},
+            "position_classes": [str(c) for c in (_position_classes(components) or [])],
+            "feature_medians": {col: float(v) for col, v in _training_medians(components).items()},
+            "top_leagues": list(components.get('top_leagues') or []),
+            # Para seguir entrenando con los mismos hiperparámetros (train.py --warm-start)
+            "training_params": training_params(components),
+            # Solo en modelos de cuantiles: una salida del booster por cada uno, en orden
+            "quantiles": [float(q) for q in components.get('quantiles') or []],
+            "files": files,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        if os.path.isdir(out_dir):
+            old_dir = out_dir + ".old"
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.rename(out_dir, old_dir)
+            os.rename(tmp_dir, out_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.rename(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    logger.info("Artefacto exportado", extra={"dir": out_dir, "version": manifest["model_version"]})
+    return manifest
+
+
+def read_manifest(artifact_dir):
+    path = os.path.join(artifact_dir, MANIFEST)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"No existe {path}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Formato de artefacto no soportado: {manifest.get('format_version')}")
+    return manifest
+
+
+def load_artifact(artifact_dir, verify=True):
+    """
+    Carga un artefacto y devuelve un dict compatible con load_model_components.
+
+    Cada worker de uvicorn parsea su propia copia del booster; el escalador
+    son dos arrays chicos que se leen enteros.
+    """
+    manifest = read_manifest(artifact_dir)
+
+    if verify:
+        for name, info in manifest["files"].items():
+            path = os.path.join(artifact_dir, name)
+            if not os.path.isfile(path) or _sha256(path) != info["sha256"]:
+                raise ArtifactError(f"Checksum inválido para {name}")
+
+    booster = xgb.Booster()
+    booster.load_model(os.path.join(artifact_dir, BOOSTER_FILE))
+    mean = np.load(os.path.join(artifact_dir, SCALER_MEAN_FILE))
+    scale = np.load(os.path.join(artifact_dir, SCALER_SCALE_FILE))
+
+    return {
+        'model': ScaledBoosterModel(booster, mean, scale),
+        'onehot_encoders': {},
+        'mlb': None,
+        'onehot_categories': manifest["onehot_categories"],
+        'position_classes': manifest["position_classes"],
+        'feature_columns': manifest["feature_columns"],
+        'feature_medians': manifest["feature_medians"],
+        'target_col': manifest["target_col"],
+        'model_type': manifest.get("model_type"),
+        'top_leagues': manifest.get("top_leagues"),
+        'model_version': manifest["model_version"],
+        'quantiles': manifest.get("quantiles") or None,
+        'training_params': manifest.get("training_params") or {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Herramientas del artefacto del modelo")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Convierte el pickle en un artefacto")
+    export.add_argument("pickle", help="Pickle de origen (p. ej. fifa_model.pkl)")
+    export.add_argument("out_dir", help="Directorio destino (p. ej. model_artifact)")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        with open(args.pickle, 'rb') as f:
+            components = pickle.load(f)
+        manifest = export_artifact(components, args.out_dir)
+        print(f"✅ Artefacto {manifest['model_version']} exportado en {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import threading
+
+from log_config import get_logger
+from model_utils import load_model_components
+
+logger = get_logger("registry")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT_DIR = os.path.join(_BACKEND_DIR, "model_artifact")
+DEFAULT_PICKLE = os.path.join(_BACKEND_DIR, "fifa_model.pkl")
+# Donde train.py deja cada corrida: el modelo de producción (model_artifact)
+# solo se reemplaza pasando --output a propósito
+ARTIFACTS_DIR = os.path.join(_BACKEND_DIR, "artifacts")
+MODEL_WATCH_INTERVAL = float(os.getenv("FIFA_MODEL_WATCH_INTERVAL", "0"))
+
+
+def default_model_path():
+    """
+    FIFA_MODEL_PATH si está definido; si no, el artefacto si existe, o el pickle
+    """
+    path = os.getenv("FIFA_MODEL_PATH")
+    if path:
+        return path
+    if os.path.isfile(os.path.join(DEFAULT_ARTIFACT_DIR, "manifest.json")):
+        return DEFAULT_ARTIFACT_DIR
+    return DEFAULT_PICKLE
+
+
+def reloadable_path(path):
+    """
+    Ruta absoluta del artefacto `path` si se puede cargar desde /admin/reload, o None.
+
+    Solo se aceptan directorios de artefacto (con manifest.json) dentro de
+    model_artifact o de artifacts: nunca un pickle, que al cargarse ejecuta
+    código, ni rutas fuera del backend. Las relativas son relativas al backend.
+    """
+    resolved = os.path.realpath(os.path.join(_BACKEND_DIR, path))
+    roots = [os.path.realpath(DEFAULT_ARTIFACT_DIR), os.path.realpath(ARTIFACTS_DIR)]
+    inside = any(resolved == root or resolved.startswith(root + os.sep) for root in roots)
+    if not inside or not os.path.isfile(os.path.join(resolved, "manifest.json")):
+        return None
+    return resolved
+
+
+class ModelRegistry:
+    """
+    Mantiene el modelo activo del proceso.
+
+    Se carga la primera vez que se pide y se puede recargar en caliente: el
+    modelo nuevo se carga aparte y recién después se reemplaza la referencia,
+    así los requests en curso terminan con el modelo que ya tenían.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_model_path()
+        self._components = None
+        self._load_lock = threading.Lock()
+        self._loaded_mtime = None
+        self.failed = False
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _source_mtime(self):
+        target = os.path.join(self.path, "manifest.json") if os.path.isdir(self.path) else self.path
+        try:
+            return os.path.getmtime(target)
+        except OSError:
+            return None
+
+    def get(self):
+        """
+        Devuelve los componentes activos, cargándolos si hace falta
+        """
+        components = self._components
+        if components is not None or self.failed:
+            return components
+        with self._load_lock:
+            if self._components is None and not self.failed:
+                mtime = self._source_mtime()
+                self._components = load_model_components(self.path)
+                self._loaded_mtime = mtime
+                self.failed = self._components is None
+            return self._components
+
+    def reload(self, path=None):
+        """
+        Carga el modelo de `path` (o el actual) y lo activa si cargó bien.
+
+        Devuelve True si se cambió el modelo.
+        """
+        with self._load_lock:
+            path = path or self.path
+            mtime = self._source_mtime() if path == self.path else None
+            components = load_model_components(path)
+            if components is None:
+                logger.error("Recarga fallida, se mantiene el modelo actual", extra={"path": path})
+                return False
+            self.path = path
+            self._components = components
+            self._loaded_mtime = mtime if mtime is not None else self._source_mtime()
+            self.failed = False
+        logger.info("Modelo recargado", extra={"path": path, "version": components.get('model_version')})
+        return True
+
+    def info(self):
+        components = self._components
+        return {
+            "path": self.path,
+            "loaded": components is not None,
+            "version": components.get('model_version') if components else None,
+            "model_type": components.get('model_type') if components else None,
+        }
+
+    def start_watching(self, interval=MODEL_WATCH_INTERVAL):
+        """
+        Revisa cada `interval` segundos si el modelo cambió en disco y lo recarga
+        """
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                mtime = self._source_mtime()
+                if mtime is not None and self._loaded_mtime is not None and mtime != self._loaded_mtime:
+                    self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
@@ -1,13 +1,14 @@
+import logging
+import os
 import pickle
 import numpy as np
 import pandas as pd
-from xgboost import XGBRegressor
-from sklearn.model_selection import RandomizedSearchCV, KFold
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from scipy.stats import uniform, randint
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-import xgboost as xgb
+from log_config import get_logger
+from debug_capture import feature_capture
+from inference_engine import native_model
+from tracing import stage
+
+logger = get_logger("model")
 
 league_mapping = {
     'Liga Profesional de Fútbol': 'LPF',
@@ -57,141 +58,340 @@ league_mapping = {
 
 def load_model_components(filename='fifa_model.pkl'):
     """
-    Carga todos los componentes del modelo
+    Carga todos los componentes del modelo.
+
+    `filename` puede ser el pickle original o un directorio de artefacto
+    exportado con model_artifact.py (más rápido de cargar).
     """
     try:
-        with open(filename, 'rb') as f:
-            components = pickle.load(f)
-
-        print(f"✅ Modelo cargado desde: {filename}")
-        print(f"📊 Componentes cargados:")
-        print(f"   - Modelo: {components['model_type']}")
-        print(f"   - OneHot Encoders: {len(components['onehot_encoders']) if components['onehot_encoders'] else 0}")
-        print(f"   - MultiLabel Binarizer: {'Sí' if components['mlb'] else 'No'}")
-        print(f"   - Features: {len(components['feature_columns'])}")
-        print(f"   - Target: {components['target_col']}")
-        if 'top_leagues' in components and components['top_leagues']:
-            print(f"   - Top Ligas: {len(components['top_leagues'])}")
+        if os.path.isdir(filename):
+            from model_artifact import load_artifact
+            components = load_artifact(filename)
         else:
-            print(f"   - Top Ligas: No especificadas")
+            with open(filename, 'rb') as f:
+                components = pickle.load(f)
+
+        components['preprocess_plan'] = PreprocessPlan(components)
+        # Motor de inferencia (FIFA_MODEL_ENGINE); el Pipeline original queda para comparar
+        if 'pipeline' not in components and hasattr(components['model'], 'named_steps'):
+            components['pipeline'] = components['model']
+        components['model'] = native_model(components['model'])
+
+        logger.info("Modelo cargado", extra={
+            "file": filename,
+            "model_type": components['model_type'],
+            "engine": type(components['model']).__name__,
+            "version": components.get('model_version'),
+            "onehot_columns": len(_onehot_categories(components)),
+            "position_classes": len(_position_classes(components) or []),
+            "features": len(components['feature_columns']),
+            "target": components['target_col'],
+            "top_leagues": len(components.get('top_leagues') or []),
+        })
         return components
 
     except FileNotFoundError:
-        print(f"❌ Error: No se encontró el archivo {filename}")
+        logger.error("No se encontró el archivo del modelo", extra={"file": filename})
         return None
     except Exception as e:
-        print(f"❌ Error cargando modelo: {e}")
+        logger.exception("Error cargando modelo", extra={"file": filename})
         return None
 
+# Columnas especiales
+SPECIAL_MULTI_COL = 'positions'
+BINARY_COL = 'preferred_foot'
+LEAGUE_COL = 'club_league_name'
+
+# Mapeo inverso (nombre en FIFA -> nombre completo), se calcula una sola vez
+fifa_to_full_league = {v: k for k, v in league_mapping.items()}
+
+
+def with_fifa_league_names(data):
+    """
+    Copia de `data` con las ligas en el nombre de FIFA, que es lo que espera el
+    preprocesamiento (así llegan del scraping). Las bases de sofifa/Kaggle traen
+    el nombre completo ("La Liga"), que sin esto cae en 'Other'.
+    """
+    if LEAGUE_COL not in data.columns:
+        return data
+    leagues = data[LEAGUE_COL]
+    fifa_names = leagues.map(league_mapping)
+    return data.assign(**{LEAGUE_COL: fifa_names.where(fifa_names.notna(), leagues)})
+
+
+def _get_column(data, col):
+    """
+    Devuelve la columna `col` como array de numpy, o None si no existe.
+    Acepta DataFrames o diccionarios de columnas.
+    """
+    if col not in data:
+        return None
+    values = data[col]
+    if isinstance(values, pd.Series):
+        return values.to_numpy()
+    return np.asarray(values)
+
+
+def _training_medians(model_components):
+    """
+    Medianas de las columnas numéricas calculadas al entrenar.
+
+    Los modelos exportados antes de guardar 'feature_medians' no las tienen;
+    en ese caso se usa la media del StandardScaler, que también se calculó
+    sobre los datos de entrenamiento.
+    """
+    medians = model_components.get('feature_medians')
+    if medians:
+        return dict(medians)
+
+    model = model_components.get('pipeline', model_components.get('model'))
+    steps = getattr(model, 'named_steps', {})
+    scaler = steps.get('scaler')
+    if scaler is not None and hasattr(scaler, 'feature_names_in_'):
+        return dict(zip(scaler.feature_names_in_, scaler.mean_))
+    return {}
+
+
+def _onehot_categories(model_components):
+    """
+    Categorías de cada OneHotEncoder, desde el vocabulario del artefacto o desde los encoders
+    """
+    categories = model_components.get('onehot_categories')
+    if categories is not None:
+        return categories
+    encoders = model_components.get('onehot_encoders') or {}
+    return {col: list(encoder.categories_[0]) for col, encoder in encoders.items()}
+
+
+def _position_classes(model_components):
+    classes = model_components.get('position_classes')
+    if classes is not None:
+        return list(classes)
+    mlb = model_components.get('mlb')
+    return list(mlb.classes_) if mlb is not None else None
+
+
+class PreprocessPlan:
+    """
+    Plan de preprocesamiento compilado una vez a partir de los componentes del modelo.
+
+    Traduce cada categoría directamente al índice de su columna en
+    `feature_columns` y escribe los datos en una matriz float32 ya ordenada,
+    sin construir DataFrames intermedios.
+    """
+
+    def __init__(self, model_components):
+        self.feature_columns = list(model_components['feature_columns'])
+        self.n_features = len(self.feature_columns)
+        col_index = {col: i for i, col in enumerate(self.feature_columns)}
+        onehot_categories = _onehot_categories(model_components)
+        position_classes = _position_classes(model_components)
+        target_col = model_components['target_col']
+
+        encoded = set()
+
+        # preferred_foot: Left -> 0, Right -> 1, resto -> -1
+        self.foot_index = col_index.get(BINARY_COL)
+        encoded.add(BINARY_COL)
+
+        # OneHotEncoders (drop='first': la primera categoría no tiene columna)
+        self.onehot = []
+        for col, categories in onehot_categories.items():
+            lookup = {}
+            for cat in categories:
+                name = f"{col}_{cat}"
+                lookup[cat] = col_index.get(name, -1)
+                encoded.add(name)
+            self.onehot.append((col, lookup))
+
+        # Ligas: se resuelve de una el nombre de FIFA a la columna one-hot;
+        # las ligas desconocidas van a 'Other'
+        self.league_lookup = None
+        self.league_default = -1
+        if LEAGUE_COL in onehot_categories:
+            lookup = dict(self.onehot.pop(
+                [c for c, _ in self.onehot].index(LEAGUE_COL))[1])
+            self.league_default = lookup.get('Other', -1)
+            self.league_lookup = {fifa: lookup.get(full, self.league_default)
+                                  for fifa, full in fifa_to_full_league.items()}
+
+        # Posiciones (MultiLabelBinarizer)
+        self.position_lookup = None
+        if position_classes is not None:
+            self.position_lookup = {cls: col_index[f"pos_{cls}"] for cls in position_classes
+                                    if f"pos_{cls}" in col_index}
+            encoded.update(f"pos_{cls}" for cls in position_classes)
+
+        # Columnas numéricas: todo lo que no salió de un encoder
+        medians = _training_medians(model_components)
+        self.numeric = [(col, col_index[col], float(medians.get(col, 0.0)))
+                        for col in self.feature_columns
+                        if col not in encoded and col != target_col]
+
+    def transform(self, data):
+        """
+        Convierte `data` (DataFrame o dict de columnas) en la matriz de features
+        """
+        if isinstance(data, pd.DataFrame):
+            n_rows = len(data)
+        else:
+            n_rows = len(next(iter(data.values()), ()))
+        X = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        if n_rows == 0:
+            return X
+        rows = np.arange(n_rows)
+
+        # Numéricas: nulos -> mediana de entrenamiento
+        for col, idx, median in self.numeric:
+            values = _get_column(data, col)
+            if values is None:
+                X[:, idx] = median
+                continue
+            if values.dtype.kind not in 'iuf':
+                values = pd.to_numeric(values, errors='coerce')
+            values = np.asarray(values, dtype=np.float64)
+            X[:, idx] = np.where(np.isnan(values), median, values)
+
+        # preferred_foot
+        values = _get_column(data, BINARY_COL)
+        if values is not None and self.foot_index is not None:
+            X[:, self.foot_index] = np.where(values == 'Right', 1, np.where(values == 'Left', 0, -1))
+
+        # Liga
+        values = _get_column(data, LEAGUE_COL)
+        if values is not None and self.league_lookup is not None:
+            lookup, default = self.league_lookup, self.league_default
+            cols = np.fromiter((lookup.get(v, default) for v in values), dtype=np.intp, count=n_rows)
+            mask = cols >= 0
+            X[rows[mask], cols[mask]] = 1
+
+        # Otras categóricas con OneHotEncoder
+        for col, lookup in self.onehot:
+            values = _get_column(data, col)
+            if values is None:
+                continue
+            cols = np.fromiter((lookup.get(v, -1) for v in values), dtype=np.intp, count=n_rows)
+            mask = cols >= 0
+            X[rows[mask], cols[mask]] = 1
+
+        # Posiciones: "ST, LW" -> pos_ST y pos_LW
+        values = _get_column(data, SPECIAL_MULTI_COL)
+        if values is not None and self.position_lookup is not None:
+            lookup = self.position_lookup
+            for row, positions in enumerate(values):
+                if not isinstance(positions, str):
+                    continue
+                for pos in positions.split(','):
+                    idx = lookup.get(pos.strip())
+                    if idx is not None:
+                        X[row, idx] = 1
+
+        return X
+
+
+def get_preprocess_plan(model_components):
+    """
+    Devuelve el plan compilado, compilándolo si los componentes no lo traen
+    """
+    plan = model_components.get('preprocess_plan')
+    if plan is None:
+        plan = PreprocessPlan(model_components)
+        model_components['preprocess_plan'] = plan
+    return plan
+
+
+def preprocess_to_matrix(new_data, model_components):
+    """
+    Preprocesa nuevos datos y devuelve la matriz float32 en el orden de 'feature_columns'
+    """
+    return get_preprocess_plan(model_components).transform(new_data)
+
+
 def preprocess_new_data(new_data, model_components):
     """
     Preprocesa nuevos datos usando los encoders guardados
     """
     if model_components is None:
-        print("❌ Error: Componentes del modelo no cargados")
+        logger.error("Componentes del modelo no cargados")
         return None
 
-    print("🔄 Preprocesando nuevos datos...")
-    data_processed = new_data.copy()
-
-    onehot_encoders = model_components['onehot_encoders']
-    mlb = model_components['mlb']
-    target_col = model_components['target_col']
-
-    # Identificar columnas categóricas y numéricas
-    categorical_cols = data_processed.select_dtypes(include=['object']).columns.tolist()
-    numerical_cols = data_processed.select_dtypes(include=['int64', 'float64']).columns.tolist()
-
-    # Remover target si está presente
-    if target_col in categorical_cols:
-        categorical_cols.remove(target_col)
-    if target_col in numerical_cols:
-        numerical_cols.remove(target_col)
-
-    # Columnas especiales
-    special_multi_col = 'positions'
-    binary_col = 'preferred_foot'
-    league_col = 'club_league_name'
-
-    for col in [special_multi_col, binary_col, league_col]:
-        if col in categorical_cols:
-            categorical_cols.remove(col)
-
-    # Manejar valores nulos
-    for col in categorical_cols:
-        if data_processed[col].isnull().any():
-            data_processed[col] = data_processed[col].fillna('Unknown')
-
-    for col in numerical_cols:
-        if data_processed[col].isnull().any():
-            median_val = data_processed[col].median()
-            data_processed[col] = data_processed[col].fillna(median_val)
-
-    # Codificar preferred_foot como binario
-    if binary_col in new_data.columns:
-        print(f"Codificando '{binary_col}' como binario...")
-        data_processed[binary_col] = data_processed[binary_col].fillna('Unknown')
-        data_processed[binary_col] = data_processed[binary_col].map({'Left': 0, 'Right': 1}).fillna(-1).astype(int)
-
-    # Codificar club_league_name con top 10 ligas
-    if league_col in new_data.columns and league_col in onehot_encoders:
-        
-        print(f"Codificando '{league_col}' con OneHotEncoder (top 15 ligas)...")
-        fifa_to_full_league = {v: k for k, v in league_mapping.items()}
-
-        # Aplicar mapeo a 'league_name'
-        data_processed[league_col] = data_processed[league_col].map(fifa_to_full_league).fillna('Unknown')
-        
-        data_processed[league_col] = data_processed[league_col].fillna('Unknown')
-
-        # Agrupar ligas no vistas como 'Other'
-        known_leagues = list(onehot_encoders[league_col].categories_[0])
-
-        data_processed[league_col] = data_processed[league_col].apply(
-            lambda x: x if x in known_leagues else 'Other'
-        )
-
-        encoded_cols = onehot_encoders[league_col].transform(data_processed[[league_col]])
-        col_names = [f"{league_col}_{cat}" for cat in onehot_encoders[league_col].categories_[0][1:]]
-        encoded_df = pd.DataFrame(encoded_cols, columns=col_names, index=data_processed.index)
-        data_processed = data_processed.drop(columns=[league_col])
-        data_processed = pd.concat([data_processed, encoded_df], axis=1)
-
-    # Aplicar OneHotEncoders para otras columnas categóricas
-    for col in categorical_cols:
-        if col in onehot_encoders:
-            data_processed[col] = data_processed[col].fillna('Unknown')
-            encoded_cols = onehot_encoders[col].transform(data_processed[[col]])
-            col_names = [f"{col}_{cat}" for cat in onehot_encoders[col].categories_[0][1:]]
-            encoded_df = pd.DataFrame(encoded_cols, columns=col_names, index=data_processed.index)
-            data_processed = data_processed.drop(columns=[col])
-            data_processed = pd.concat([data_processed, encoded_df], axis=1)
-
-    # Procesar player_positions si existe
-    if special_multi_col in new_data.columns and mlb is not None:
-        data_processed[special_multi_col] = data_processed[special_multi_col].fillna('Unknown')
-        multilabel_values = data_processed[special_multi_col].str.split(',\s*')
-        position_dummies = pd.DataFrame(mlb.transform(multilabel_values),
-                                        columns=[f"pos_{cls}" for cls in mlb.classes_],
-                                        index=data_processed.index)
-        data_processed = pd.concat([data_processed.drop(columns=[special_multi_col]), position_dummies], axis=1)
-
-    # Asegurar que tenemos todas las columnas del modelo entrenado
-    expected_features = model_components['feature_columns']
-    missing_cols = set(expected_features) - set(data_processed.columns)
-
-    if missing_cols:
-        print(f"⚠️  Columnas faltantes: {missing_cols}")
-        for col in missing_cols:
-            data_processed[col] = 0
-
-    # Ordenar columnas
-    data_processed = data_processed[expected_features]
-
-    print(f"✅ Datos preprocesados: {data_processed.shape}")
-    data_processed.to_csv('data_processed.csv', index=False)
+    X = preprocess_to_matrix(new_data, model_components)
+    index = new_data.index if isinstance(new_data, pd.DataFrame) else None
+    data_processed = pd.DataFrame(X, columns=model_components['feature_columns'], index=index)
+
+    logger.debug("Datos preprocesados", extra={"rows": X.shape[0], "features": X.shape[1]})
     return data_processed
 
+def band_columns(model_components):
+    """
+    Columnas extra que agrega un modelo de cuantiles (p. ej. predicted_price_p10);
+    vacío para un modelo de una sola salida
+    """
+    # Las salidas se ordenan por fila (ver _split_quantiles): los nombres van en orden creciente
+    quantiles = sorted(model_components.get('quantiles') or [])
+    if not quantiles:
+        return []
+    point = _point_quantile_index(quantiles)
+    return [f"predicted_price_p{round(q * 100)}" for i, q in enumerate(quantiles) if i != point]
+
+
+def _point_quantile_index(quantiles):
+    # La estimación puntual es el cuantil más cercano a la mediana
+    return int(np.argmin(np.abs(np.asarray(quantiles, dtype=np.float64) - 0.5)))
+
+
+def _split_quantiles(raw, model_components):
+    """
+    Separa la salida del modelo en estimación puntual y bandas {columna: array}
+    """
+    quantiles = model_components.get('quantiles') or []
+    if raw.ndim == 1 or not quantiles:
+        # Modelo de una sola salida
+        return (raw if raw.ndim == 1 else raw[:, 0]), {}
+    # Los cuantiles se predicen por separado y pueden cruzarse: se ordenan por fila,
+    # así la columna i es el i-ésimo cuantil de menor a mayor
+    raw = np.sort(raw, axis=1)
+    point = _point_quantile_index(sorted(quantiles))
+    others = [i for i in range(len(quantiles)) if i != point]
+    return raw[:, point], {name: raw[:, i] for name, i in zip(band_columns(model_components), others)}
+
+
+def predict_prices(new_data, model_components, return_bands=False):
+    """
+    Predice sobre un DataFrame o un dict de columnas y devuelve el array de precios.
+
+    Si el modelo predice cuantiles (p. ej. p10/p50/p90) salen todos del mismo
+    predict; con `return_bands` se devuelve (precios, {columna: banda}).
+    """
+    with stage("preprocess"):
+        X = preprocess_to_matrix(new_data, model_components)
+
+    # Los motores nativos (inference_engine) reciben la matriz float32 tal cual.
+    # El Pipeline escala en float64 como al entrenar: escalar en float32 corre
+    # algunos valores que caen justo sobre los cortes de los árboles
+    model = model_components['model']
+    X_model = X
+    if not getattr(model, 'native', False):
+        X_model = X.astype(np.float64)
+        if hasattr(model, 'feature_names_in_'):
+            # El Pipeline de sklearn se entrenó con un DataFrame
+            X_model = pd.DataFrame(X_model, columns=model_components['feature_columns'])
+    with stage("model_predict"):
+        predictions, bands = _split_quantiles(np.asarray(model.predict(X_model)), model_components)
+
+    # Muestreo opcional de features para depurar (FIFA_DEBUG_CAPTURE=1), sin I/O
+    feature_capture.capture(X, predictions)
+    if logger.isEnabledFor(logging.DEBUG) and len(predictions):
+        logger.debug("Predicciones realizadas", extra={
+            "rows": len(predictions),
+            "mean": float(predictions.mean()),
+            "median": float(np.median(predictions)),
+            "min": float(predictions.min()),
+            "max": float(predictions.max()),
+        })
+    return (predictions, bands) if return_bands else predictions
+
+
 def predict_new_data(new_data, model_components):
     """
     Hace predicciones en nuevos datos
@@ -199,73 +399,46 @@ def predict_new_data(new_data, model_components):
     if model_components is None:
         return None
 
-    # Preprocesar datos
-    X_new = preprocess_new_data(new_data, model_components)
-    if X_new is None:
-        return None
-
-    # Hacer predicciones
-    model = model_components['model']
-    predictions = model.predict(X_new)
-    print(f"\n🎯 Predicciones realizadas: {len(predictions)}")
-    print(f"📊 Estadísticas de predicciones:")
-    print(f"   Media: {predictions.mean():.2f}")
-    print(f"   Mediana: {np.median(predictions):.2f}")
-    print(f"   Min: {predictions.min():.2f}")
-    print(f"   Max: {predictions.max():.2f}")
+    predictions, bands = predict_prices(new_data, model_components, return_bands=True)
     new_data['predicted_price'] = predictions
+    for col, values in bands.items():
+        new_data[col] = values
     return new_data
 
-def test_model_on_new_data(new_data_path=None, new_data_df=None):
+def test_model_on_new_data(new_data_path=None, new_data_df=None, model_components=None):
     """
-    Prueba el modelo en nuevos datos
+    Prueba el modelo en nuevos datos.
+
+    Reutiliza `model_components` si se pasan; para archivos grandes conviene
+    usar batch_predict.py, que procesa el CSV por partes.
     """
     # Cargar nuevos datos
     if new_data_df is not None:
         new_data = new_data_df.copy()
-        print("📊 Usando datos proporcionados")
     elif new_data_path:
         new_data = pd.read_csv(new_data_path)
-        print(f"📊 Datos cargados desde: {new_data_path}")
     else:
-        print("❌ Error: Proporciona nuevos datos (DataFrame o ruta)")
-        return
-
-    print(f"📈 Nuevos datos: {new_data.shape}")
+        logger.error("Proporciona nuevos datos (DataFrame o ruta)")
+        return None
 
-    # Cargar modelo
-    components = load_model_components()
+    # Cargar modelo solo si no nos lo pasaron
+    components = model_components or load_model_components()
     if components is None:
-        return
+        return None
 
     # Hacer predicciones
     results = predict_new_data(new_data, components)
-
     if results is None:
-        print("❌ Error en las predicciones")
-        return
-
-    # Procesar resultados
-    if isinstance(results, tuple):  # Clasificador con probabilidades
-        predictions, probabilities = results
-        print(f"\n🎯 Predicciones realizadas: {len(predictions)}")
-        print(f"📊 Distribución de predicciones:")
-        unique, counts = np.unique(predictions, return_counts=True)
-        for val, count in zip(unique, counts):
-            print(f"   Clase {val}: {count} ({count/len(predictions):.1%})")
-
-        # Agregar predicciones al DataFrame
-        new_data['predicted_class'] = predictions
-        new_data['predicted_probability'] = probabilities.max(axis=1)
-
-    else:  # Regresor
-        predictions = results
-        print(f"\n🎯 Predicciones realizadas: {len(predictions)}")
-        print(f"📊 Estadísticas de predicciones:")
-        print(f"   Media: {predictions.mean():.2f}")
-        print(f"   Mediana: {np.median(predictions):.2f}")
-        print(f"   Min: {predictions.min():.2f}")
-        print(f"   Max: {predictions.max():.2f}")
-        # Agregar predicciones al DataFrame
-        new_data['predicted_price'] = predictions
-    return new_data
\ No newline at end of file
+        logger.error("Error en las predicciones")
+        return None
+
+    predictions = results['predicted_price']
+    logger.info("Predicciones realizadas", extra={
+        "source": new_data_path or "DataFrame",
+        "rows": len(predictions),
+        "mean": float(predictions.mean()),
+        "median": float(predictions.median()),
+        "min": float(predictions.min()),
+        "max": float(predictions.max()),
+    })
+    return results
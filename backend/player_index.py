@@ -0,0 +1,327 @@
+"""
+Índice precalculado de predicciones para los jugadores de la base local.
+
+Se construye una vez (offline) pasando toda la base por predict_new_data y se
+guarda como arrays de numpy que se abren con memory-mapping, junto con un
+índice de prefijos por palabra y un índice invertido de trigramas para
+búsquedas aproximadas.
+
+player-data-full.csv no trae nombres; para poder buscar por nombre hay que
+sumar un CSV con `player_id` y nombre (por ejemplo el de Kaggle que usa el
+notebook), que se une por player_id igual que al entrenar:
+
+    python player_index.py build player-data-full.csv --extra player-data-full-2025-june.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cache import normalize_player_name
+from cards import FEATURE_COLUMNS
+from log_config import get_logger
+
+logger = get_logger("player_index")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_DIR = os.getenv("PLAYER_INDEX_PATH", os.path.join(_BACKEND_DIR, "player_index"))
+INDEX_FORMAT_VERSION = 1
+NAME_COLUMNS = ['name', 'Name', 'full_name', 'long_name', 'short_name']
+MIN_FUZZY_SCORE = 0.5
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _gram_code(gram):
+    # Tres caracteres unicode (21 bits cada uno) en un int64
+    a, b, c = (ord(ch) for ch in gram)
+    return (a << 42) | (b << 21) | c
+
+
+def build_index(data, model_components, out_dir):
+    """
+    Predice todas las filas de `data` y escribe el índice en `out_dir`
+    """
+    from model_utils import band_columns, predict_new_data, with_fifa_league_names
+
+    name_col = next((col for col in NAME_COLUMNS if col in data.columns), None)
+    if name_col is None:
+        # Sin nombres no se puede buscar, y sin el CSV de sofifa casi todas las
+        # features (liga, pie, posiciones, altura) saldrían de las medianas
+        raise ValueError(f"Los datos no tienen columna de nombre ({', '.join(NAME_COLUMNS)}); "
+                         "sumá el CSV de sofifa con --extra")
+    # Ligas con el nombre de FIFA, igual que en las cartas scrapeadas
+    data = with_fifa_league_names(data.reset_index(drop=True))
+    names = data[name_col].fillna('').astype(str)
+    normalized = [normalize_player_name(name) for name in names]
+
+    bands = band_columns(model_components)
+    predicted = predict_new_data(data.copy(), model_components)
+    predictions = predicted['predicted_price'].to_numpy()
+
+    out_dir = os.path.abspath(out_dir)
+    tmp_dir = tempfile.mkdtemp(prefix=".index-", dir=os.path.dirname(out_dir))
+    os.chmod(tmp_dir, 0o755)
+    try:
+        def save(name, array):
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+
+        save("player_id", data['player_id'].to_numpy(dtype=np.int64))
+        save("predicted_price", predictions.astype(np.float32))
+        for col in bands:
+            save(f"band_{col}", predicted[col].to_numpy(dtype=np.float32))
+        save("name", np.asarray(names, dtype=str))
+
+        # Columnas de la carta disponibles en la base, para responder sin scrapear
+        stored_columns = []
+        for col in FEATURE_COLUMNS:
+            if col == 'player_id' or col not in data.columns:
+                continue
+            values = data[col]
+            if pd.api.types.is_numeric_dtype(values):
+                save(f"col_{col}", values.to_numpy(dtype=np.float32))
+            else:
+                save(f"col_{col}", values.fillna('').astype(str).to_numpy(dtype=str))
+            stored_columns.append(col)
+
+        # Índice de prefijos: cada palabra de cada nombre, ordenada
+        token_list, token_rows = [], []
+        for row, name in enumerate(normalized):
+            for token in set(name.split()):
+                token_list.append(token)
+                token_rows.append(row)
+        order = np.argsort(np.asarray(token_list, dtype=str), kind='stable')
+        save("tokens", np.asarray(token_list, dtype=str)[order])
+        save("token_rows", np.asarray(token_rows, dtype=np.int32)[order])
+
+        # Nombres completos normalizados, ordenados (búsqueda exacta)
+        order = np.argsort(np.asarray(normalized, dtype=str), kind='stable')
+        save("full_names", np.asarray(normalized, dtype=str)[order])
+        save("full_name_rows", order.astype(np.int32))
+
+        # Índice invertido de trigramas (CSR: códigos ordenados + offsets + filas)
+        postings = {}
+        gram_counts = np.zeros(len(normalized), dtype=np.int32)
+        for row, name in enumerate(normalized):
+            if not name:
+                continue
+            grams = _trigrams(name)
+            gram_counts[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(_gram_code(gram), []).append(row)
+        codes = np.array(sorted(postings), dtype=np.int64)
+        lengths = np.array([len(postings[c]) for c in codes], dtype=np.int64)
+        save("gram_codes", codes)
+        save("gram_offsets", np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+        save("gram_rows", np.array([r for c in codes for r in postings[c]], dtype=np.int32))
+        save("gram_counts", gram_counts)
+
+        with open(os.path.join(tmp_dir, "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                "format_version": INDEX_FORMAT_VERSION,
+                "rows": len(data),
+                "named_rows": int(sum(1 for n in normalized if n)),
+                "columns": stored_columns,
+                "bands": bands,
+                "model_version": model_components.get('model_version'),
+            }, f, indent=2)
+
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.rename(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    logger.info("Índice construido", extra={"dir": out_dir, "rows": len(data)})
+    return out_dir
+
+
+class PlayerIndex:
+    """
+    Índice de solo lectura, abierto con memory-mapping
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        with open(os.path.join(index_dir, "index.json"), encoding='utf-8') as f:
+            self.info = json.load(f)
+        if self.info.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Formato de índice no soportado: {self.info.get('format_version')}")
+
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r')
+
+        self.player_id = load("player_id")
+        self.predicted_price = load("predicted_price")
+        self.name = load("name")
+        self.columns = {col: load(f"col_{col}") for col in self.info["columns"]}
+        self.bands = {col: load(f"band_{col}") for col in self.info.get("bands", [])}
+        self.tokens = load("tokens")
+        self.token_rows = load("token_rows")
+        self.full_names = load("full_names")
+        self.full_name_rows = load("full_name_rows")
+        self.gram_codes = load("gram_codes")
+        self.gram_offsets = load("gram_offsets")
+        self.gram_rows = load("gram_rows")
+        self.gram_counts = load("gram_counts")
+        self._id_to_row = None
+
+    def __len__(self):
+        return len(self.player_id)
+
+    def _prefix_rows(self, prefix):
+        start = np.searchsorted(self.tokens, prefix, side='left')
+        # Todo lo que empieza con `prefix` queda antes de prefix + el mayor caracter
+        end = np.searchsorted(self.tokens, prefix + '\U0010ffff', side='left')
+        return np.unique(self.token_rows[start:end])
+
+    def exact_rows(self, query):
+        """
+        Filas cuyo nombre normalizado es exactamente `query`
+        """
+        key = normalize_player_name(query)
+        start = np.searchsorted(self.full_names, key, side='left')
+        end = np.searchsorted(self.full_names, key, side='right')
+        return self.full_name_rows[start:end].tolist()
+
+    def prefix_rows(self, query, limit=None):
+        """
+        Filas donde cada palabra de `query` es prefijo de alguna palabra del
+        nombre, de mayor a menor precio predicho
+        """
+        tokens = normalize_player_name(query).split()
+        if not tokens:
+            return []
+        rows = self._prefix_rows(tokens[0])
+        for token in tokens[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, self._prefix_rows(token), assume_unique=True)
+        order = np.argsort(-self.predicted_price[rows], kind='stable')[:limit]
+        return rows[order].tolist()
+
+    def fuzzy_rows(self, query, limit=10):
+        """
+        Filas más parecidas por trigramas (tolera errores de tipeo)
+        """
+        key = normalize_player_name(query)
+        if not key or not len(self.gram_codes):
+            return []
+        grams = _trigrams(key)
+        codes = np.array(sorted(_gram_code(g) for g in grams), dtype=np.int64)
+        positions = np.searchsorted(self.gram_codes, codes)
+        valid = positions < len(self.gram_codes)
+        positions, codes = positions[valid], codes[valid]
+        positions = positions[self.gram_codes[positions] == codes]
+        if not len(positions):
+            return []
+        hits = np.concatenate([self.gram_rows[self.gram_offsets[p]:self.gram_offsets[p + 1]]
+                               for p in positions])
+        candidates, shared = np.unique(hits, return_counts=True)
+        # Qué parte de los trigramas de la búsqueda aparece en el nombre;
+        # a igual puntaje gana el nombre más corto
+        score = shared / len(grams)
+        keep = score >= MIN_FUZZY_SCORE
+        candidates, score = candidates[keep], score[keep]
+        best = np.lexsort((self.gram_counts[candidates], -score))[:limit]
+        return candidates[best].tolist()
+
+    def search(self, query, limit=10):
+        """
+        Busca por nombre: primero por prefijos de palabra y, si no hay nada,
+        por similitud de trigramas
+        """
+        rows = self.prefix_rows(query, limit)
+        if not rows:
+            rows = self.fuzzy_rows(query, limit)
+        return [{"player_id": int(self.player_id[r]), "name": str(self.name[r]),
+                 "predicted_price": round(float(self.predicted_price[r]), 2)} for r in rows]
+
+    def records(self, rows):
+        """
+        Arma registros con el mismo formato que /predict para las filas dadas
+        """
+        records = []
+        for r in rows:
+            record = {"player_id": int(self.player_id[r])}
+            for col, values in self.columns.items():
+                value = values[r]
+                record[col] = value.item() if hasattr(value, 'item') else str(value)
+            record["predicted_price"] = round(float(self.predicted_price[r]), 2)
+            for col, values in self.bands.items():
+                record[col] = round(float(values[r]), 2)
+            record.update({"Name": str(self.name[r]), "card": None, "price": None, "link": None})
+            records.append(record)
+        return records
+
+    def get_by_id(self, player_id):
+        if self._id_to_row is None:
+            self._id_to_row = {int(pid): row for row, pid in enumerate(self.player_id)}
+        row = self._id_to_row.get(int(player_id))
+        return None if row is None else self.records([row])[0]
+
+
+def load_player_index(index_dir=DEFAULT_INDEX_DIR):
+    """
+    Abre el índice si existe; devuelve None si no se construyó todavía
+    """
+    if not os.path.isfile(os.path.join(index_dir, "index.json")):
+        return None
+    try:
+        index = PlayerIndex(index_dir)
+    except (OSError, ValueError):
+        logger.exception("No se pudo abrir el índice de jugadores", extra={"dir": index_dir})
+        return None
+    logger.info("Índice de jugadores cargado", extra={"dir": index_dir, "rows": len(index)})
+    return index
+
+
+def _read_players(path, extra=None):
+    data = pd.read_csv(path)
+    if extra:
+        # Igual que en el notebook: se suman los datos del otro CSV por player_id
+        other = pd.read_csv(extra).drop_duplicates('player_id')
+        other = other.drop(columns=[c for c in other.columns if c in data.columns and c != 'player_id'])
+        data = data.merge(other, on='player_id', how='left')
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice precalculado de predicciones")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Predice la base y construye el índice")
+    build.add_argument("data", help="CSV de jugadores (p. ej. player-data-full.csv)")
+    build.add_argument("--extra", help="CSV con nombres/atributos extra, unido por player_id")
+    build.add_argument("-o", "--output", default=DEFAULT_INDEX_DIR, help="Directorio del índice")
+    build.add_argument("-m", "--model", default=None, help="Modelo a usar")
+    search = sub.add_parser("search", help="Prueba una búsqueda en el índice")
+    search.add_argument("query")
+    search.add_argument("-i", "--index", default=DEFAULT_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from model_registry import default_model_path
+        from model_utils import load_model_components
+
+        components = load_model_components(args.model or default_model_path())
+        if components is None:
+            raise SystemExit("No se pudo cargar el modelo")
+        try:
+            build_index(_read_players(args.data, args.extra), components, args.output)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"✅ Índice construido en {args.output}")
+    elif args.command == "search":
+        index = PlayerIndex(args.index)
+        print(json.dumps(index.search(args.query), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Profiler por muestreo para requests lentos (opcional, sin dependencias).
+
+Con FIFA_PROFILE_SLOW_MS > 0, mientras haya requests en curso un thread toma
+cada FIFA_PROFILE_INTERVAL_MS el stack de todos los threads del proceso
+(event loop y pools). Si un request tarda más que el umbral, sus muestras se
+guardan en FIFA_PROFILE_DIR en formato "folded", que se convierte en
+flamegraph con flamegraph.pl o se abre directo en https://www.speedscope.app.
+
+Como se muestrean todos los threads, con requests concurrentes el perfil de
+uno incluye el trabajo de los otros.
+"""
+import collections
+import os
+import re
+import sys
+import threading
+import time
+
+from log_config import get_logger
+
+logger = get_logger("profiler")
+
+PROFILE_SLOW_MS = float(os.getenv("FIFA_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("FIFA_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("FIFA_PROFILE_DIR", "profiles")
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _collapse(frame, thread_name):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ";".join(reversed(stack))
+
+
+class _Session:
+    def __init__(self):
+        self.samples = collections.Counter()
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms=PROFILE_SLOW_MS, interval_ms=PROFILE_INTERVAL_MS,
+                 out_dir=PROFILE_DIR):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.out_dir = out_dir
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                while not self._sessions:
+                    self._wake.wait()
+                sessions = list(self._sessions)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [_collapse(frame, names.get(ident, str(ident)))
+                      for ident, frame in sys._current_frames().items() if ident != own_id]
+            for session in sessions:
+                session.samples.update(stacks)
+            time.sleep(self.interval)
+
+    def start(self):
+        """
+        Empieza a muestrear para un request; devuelve la sesión o None
+        """
+        if not self.enabled:
+            return None
+        session = _Session()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+            self._sessions.add(session)
+            self._wake.notify()
+        return session
+
+    def finish(self, session, elapsed, label):
+        """
+        Cierra la sesión y la guarda si el request superó el umbral
+        """
+        if session is None:
+            return None
+        with self._lock:
+            self._sessions.discard(session)
+        samples = session.samples
+        if elapsed < self.threshold or not samples:
+            return None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = _SAFE_NAME_RE.sub("_", label).strip("_") or "request"
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms-{name}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("Perfil de request lento guardado", extra={"path": path, "ms": round(elapsed * 1000, 1)})
+        return path
+
+
+slow_request_profiler = SlowRequestProfiler()
@@ -1,169 +1,467 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+import os
+import threading
 import time
+import urllib.parse
+import urllib.request
+import re
+import numpy as np
 import pandas as pd
+from browser_pool import get_browser_pool
+from futbin_parser import (RAW_COLUMNS, FutbinParseError, iter_player_rows, parse_player_rows,
+                           parser_available, rows_to_columns)
+from cards import CardBatch, META_COLUMNS
+from log_config import get_logger
+from tracing import record, stage
 
-def get_player_data_from_futbin(player_name: str) -> list:
-    # Configuración Chrome headless para Colab / Linux
-    chrome_options = webdriver.ChromeOptions()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
+logger = get_logger("scrapper")
 
-    driver = webdriver.Chrome(options=chrome_options)
+FUTBIN_BASE_URL = os.getenv("FUTBIN_BASE_URL", "https://www.futbin.com")
+# "html": el navegador carga la página y se parsea page_source de una vez (por defecto)
+# "http": GET directo sin navegador, con el navegador como respaldo
+# "selenium": recorrido campo por campo con WebDriver
+FUTBIN_FETCH_MODE = os.getenv("FUTBIN_FETCH_MODE", "html")
+HTTP_TIMEOUT = float(os.getenv("FUTBIN_HTTP_TIMEOUT", "10"))
+_COMMA_RE = re.compile(r'\s*,\s*')
+HTTP_USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+# Espera de la página: el timeout se ajusta a lo que viene tardando futbin
+PAGE_WAIT_INITIAL = float(os.getenv("FUTBIN_PAGE_WAIT_INITIAL", "2"))
+PAGE_WAIT_MIN = float(os.getenv("FUTBIN_PAGE_WAIT_MIN", "2"))
+PAGE_WAIT_MAX = float(os.getenv("FUTBIN_PAGE_WAIT_MAX", "15"))
+PAGE_WAIT_FACTOR = float(os.getenv("FUTBIN_PAGE_WAIT_FACTOR", "3"))
+# Páginas de resultados a recorrer por jugador y filas que trae una página completa
+FUTBIN_MAX_PAGES = int(os.getenv("FUTBIN_MAX_PAGES", "1"))
+FUTBIN_PAGE_SIZE = int(os.getenv("FUTBIN_PAGE_SIZE", "30"))
+# Cartas por tanda en iter_player_cards
+STREAM_BATCH_SIZE = int(os.getenv("FUTBIN_STREAM_BATCH", "4"))
+HTTP_CHUNK_SIZE = 16 * 1024
 
-    try:
-        link = f'https://www.futbin.com/players?search={player_name}&showStats=Age%2CWeight&gender=men'
-        driver.get(link)
-        time.sleep(1)  # Esperar a que cargue la página
-
-        # Listas para guardar datos
-        names = []
-        ratings = []
-        strongfoot = []
-        weakfoot = []
-        position = []
-        sidePosition = []
-        skill_moves = []
-        pace = []
-        shooting = []
-        passing = []
-        dribbling = []
-        defending = []
-        physic = []
-        body = []
-        age = []
-        weight = []
-        price = []
-        league = []
-        card_type = []
-        links = []
-        
-        tbody_rows = driver.find_elements(By.CLASS_NAME, 'player-row')
-        for row in tbody_rows:
-            
-            try:
-                anchor_tags = row.find_elements(By.TAG_NAME, 'a')
-                if anchor_tags:
-                    found_player_link = False
-                    for anchor in anchor_tags:
-                        href = anchor.get_attribute('href')
-                        if href and 'player' in href.lower():  
-                            links.append(href)
-                            found_player_link = True
-                            break
-                    if not found_player_link:
-                        print("No relevant player link found in anchor tags")
-                        links.append(None)
-                else:
-                    print("No anchor tags found in the row")
-                    links.append(None)
-            except Exception as e:
-                    print(f"Error while searching for anchor tags: {str(e)}")
+# Hay filas de resultados, o la página terminó de cargar sin ninguna (jugador no encontrado)
+_PAGE_READY_JS = ("return document.getElementsByClassName('player-row').length > 0"
+                  " || document.readyState === 'complete';")
+
+
+class AdaptiveTimeout:
+    """
+    Timeout que sigue el tiempo de carga reciente (media móvil exponencial).
+
+    Se espera hasta `factor` veces lo habitual, entre `minimum` y `maximum`:
+    si futbin anda rápido no se pierde tiempo, y si está lento se le da más
+    margen en lugar de devolver la página vacía.
+    """
+
+    def __init__(self, initial=PAGE_WAIT_INITIAL, minimum=PAGE_WAIT_MIN,
+                 maximum=PAGE_WAIT_MAX, factor=PAGE_WAIT_FACTOR, alpha=0.2):
+        self.average = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def timeout(self):
+        return min(max(self.average * self.factor, self.minimum), self.maximum)
+
+    def observe(self, seconds):
+        with self._lock:
+            self.average = self.alpha * seconds + (1 - self.alpha) * self.average
+
+
+page_wait = AdaptiveTimeout()
+
+
+def build_search_url(player_name: str, page: int = 1) -> str:
+    query = urllib.parse.quote(player_name)
+    url = f'{FUTBIN_BASE_URL}/players?search={query}&showStats=Age%2CWeight&gender=men'
+    return f'{url}&page={page}' if page > 1 else url
+
+
+def extract_rows_with_selenium(driver) -> dict:
+    """
+    Recorre las filas con WebDriver, un find_element por campo (lento, pero no
+    depende de lxml)
+    """
+    # Listas para guardar datos
+    names = []
+    ratings = []
+    strongfoot = []
+    weakfoot = []
+    position = []
+    sidePosition = []
+    skill_moves = []
+    pace = []
+    shooting = []
+    passing = []
+    dribbling = []
+    defending = []
+    physic = []
+    body = []
+    age = []
+    weight = []
+    price = []
+    league = []
+    card_type = []
+    links = []
+
+    tbody_rows = driver.find_elements(By.CLASS_NAME, 'player-row')
+    for row in tbody_rows:
+
+        try:
+            anchor_tags = row.find_elements(By.TAG_NAME, 'a')
+            if anchor_tags:
+                found_player_link = False
+                for anchor in anchor_tags:
+                    href = anchor.get_attribute('href')
+                    if href and 'player' in href.lower():  
+                        links.append(href)
+                        found_player_link = True
+                        break
+                if not found_player_link:
+                    logger.debug("No relevant player link found in anchor tags")
                     links.append(None)
-          
-            names.append(row.find_element(By.CLASS_NAME, 'table-player-name').text)
-            print(names[-1])
-            ratings.append(row.find_element(By.CLASS_NAME, 'player-rating-card-text').text)
-            position.append(row.find_element(By.CLASS_NAME, 'table-pos-main').text)
-            try:
-                sidePosition.append(row.find_element(By.CLASS_NAME, 'table-pos').find_element(By.CLASS_NAME, 'text-faded').text)
-            except:
-                sidePosition.append('')
-            price.append(row.find_element(By.CLASS_NAME, 'price').text)
-            weakfoot.append(row.find_element(By.CLASS_NAME, 'table-weak-foot').text)
-            card_type.append(row.find_element(By.CLASS_NAME, 'table-player-revision').text)
-            skill_moves.append(row.find_element(By.CLASS_NAME, 'table-skills').text)
-            pace.append(row.find_element(By.CLASS_NAME, 'table-key-stats').text)
-            shooting.append(row.find_element(By.CLASS_NAME, 'table-shooting').text)
-            passing.append(row.find_element(By.CLASS_NAME, 'table-passing').text)
-            dribbling.append(row.find_element(By.CLASS_NAME, 'table-dribbling').text)
-            defending.append(row.find_element(By.CLASS_NAME, 'table-defending').text)
-            physic.append(row.find_element(By.CLASS_NAME, 'table-physicality').text)
-            body.append(row.find_element(By.CLASS_NAME, 'table-height').text)
-            age.append(row.find_element(By.CLASS_NAME, 'table-age').text)
-            weight.append(row.find_element(By.CLASS_NAME, 'table-weight').text)
-            league.append(row.find_element(By.CLASS_NAME, 'table-player-league').find_element(By.TAG_NAME, 'img').get_attribute('title'))
-            
-            player_strongfoot = row.find_element(By.CLASS_NAME, 'table-foot').find_element(By.TAG_NAME, 'img').get_attribute('src')
-            if 'right' in player_strongfoot.lower():
-                strongfoot.append('Right')
             else:
-                strongfoot.append('Left')
-
-        # Crear DataFrame
-        players_df = pd.DataFrame({
-            'Name': names,
-            'overall_rating': ratings,
-            'Position': position,
-            'Side Position': sidePosition,
-            'price': price,
-            'weak_foot': weakfoot,
-            'skill_moves': skill_moves,
-            'pace': pace,
-            'shooting': shooting,
-            'passing': passing,
-            'dribbling': dribbling,
-            'defending': defending,
-            'physic': physic,
-            'Body Type': body,
-            'age': age,
-            'weight_kg': weight,
-            'preferred_foot': strongfoot,
-            'club_league_name': league,
-            'card': card_type,
-            'link': links,
-        })
-        players_df['positions'] = (
-            players_df['Position'].str.replace(r'\+\+', '', regex=True).str.strip() + ', ' + 
-            players_df['Side Position'].str.replace(r'\+\+', '', regex=True).str.replace(r'\s*,\s*', ', ', regex=True).str.strip()
-        ).str.strip(', ')
-        
-        players_df = players_df.drop(['Position', 'Side Position'], axis=1)
-        
-        # Limpiar columnas numéricas y convertir tipos
-        players_df['height_cm'] = players_df['Body Type'].str.split('|').str[0].str.strip().str.replace('cm', '').astype(int)
-        players_df['weight_kg'] = players_df['weight_kg'].str.replace('kg', '').astype(int)
-        players_df = players_df.drop(columns=['Body Type'])
-        
-        numeric_cols = ['age', 'height_cm', 'weight_kg', 'weak_foot', 'skill_moves',
-                        'overall_rating', 'pace', 'shooting', 'passing', 'dribbling', 'defending', 'physic']
-
-        for col in numeric_cols:
-            players_df[col] = pd.to_numeric(players_df[col], errors='coerce')
-
-
-        # Finalmente armar la lista con la estructura que quieres
-        result = []
-        for idx, row in players_df.iterrows():
-            features = {
-                "player_id": idx, 
-                "club_league_name": row['club_league_name'],
-                "preferred_foot": row['preferred_foot'],
-                "positions": row['positions'],
-                "height_cm": row['height_cm'],
-                "weight_kg": row['weight_kg'],
-                "weak_foot": row['weak_foot'],
-                "skill_moves": row['skill_moves'],
-                "overall_rating": row['overall_rating'],
-                "age": row['age'],
-                "pace": row['pace'],
-                "shooting": row['shooting'],
-                "passing": row['passing'],
-                "dribbling": row['dribbling'],
-                "defending": row['defending'],
-                "physic": row['physic'],
-            }
-            meta = {
-                "player_id": idx,
-                "Name": row['Name'],
-                "card": row['card'],
-                "price": row['price'],
-                "link": row['link'],
-            }
-            result.append({"features": features, "meta": meta})
-        return result
-
-    finally:
-        driver.quit()
+                logger.debug("No anchor tags found in the row")
+                links.append(None)
+        except Exception as e:
+                logger.warning("Error while searching for anchor tags", extra={"error": str(e)})
+                links.append(None)
+
+        names.append(row.find_element(By.CLASS_NAME, 'table-player-name').text)
+        logger.debug("Carta encontrada", extra={"player": names[-1]})
+        ratings.append(row.find_element(By.CLASS_NAME, 'player-rating-card-text').text)
+        position.append(row.find_element(By.CLASS_NAME, 'table-pos-main').text)
+        try:
+            sidePosition.append(row.find_element(By.CLASS_NAME, 'table-pos').find_element(By.CLASS_NAME, 'text-faded').text)
+        except:
+            sidePosition.append('')
+        price.append(row.find_element(By.CLASS_NAME, 'price').text)
+        weakfoot.append(row.find_element(By.CLASS_NAME, 'table-weak-foot').text)
+        card_type.append(row.find_element(By.CLASS_NAME, 'table-player-revision').text)
+        skill_moves.append(row.find_element(By.CLASS_NAME, 'table-skills').text)
+        pace.append(row.find_element(By.CLASS_NAME, 'table-key-stats').text)
+        shooting.append(row.find_element(By.CLASS_NAME, 'table-shooting').text)
+        passing.append(row.find_element(By.CLASS_NAME, 'table-passing').text)
+        dribbling.append(row.find_element(By.CLASS_NAME, 'table-dribbling').text)
+        defending.append(row.find_element(By.CLASS_NAME, 'table-defending').text)
+        physic.append(row.find_element(By.CLASS_NAME, 'table-physicality').text)
+        body.append(row.find_element(By.CLASS_NAME, 'table-height').text)
+        age.append(row.find_element(By.CLASS_NAME, 'table-age').text)
+        weight.append(row.find_element(By.CLASS_NAME, 'table-weight').text)
+        league.append(row.find_element(By.CLASS_NAME, 'table-player-league').find_element(By.TAG_NAME, 'img').get_attribute('title'))
+
+        player_strongfoot = row.find_element(By.CLASS_NAME, 'table-foot').find_element(By.TAG_NAME, 'img').get_attribute('src')
+        if 'right' in player_strongfoot.lower():
+            strongfoot.append('Right')
+        else:
+            strongfoot.append('Left')
+
+    return {
+        'Name': names,
+        'overall_rating': ratings,
+        'Position': position,
+        'Side Position': sidePosition,
+        'price': price,
+        'weak_foot': weakfoot,
+        'skill_moves': skill_moves,
+        'pace': pace,
+        'shooting': shooting,
+        'passing': passing,
+        'dribbling': dribbling,
+        'defending': defending,
+        'physic': physic,
+        'Body Type': body,
+        'age': age,
+        'weight_kg': weight,
+        'preferred_foot': strongfoot,
+        'club_league_name': league,
+        'card': card_type,
+        'link': links,
+    }
+
+
+def _clean_positions(main, side):
+    main = main.replace('++', '').strip()
+    side = _COMMA_RE.sub(', ', side.replace('++', '')).strip()
+    return (main + ', ' + side).strip(', ')
+
+
+def _to_numeric(values):
+    return pd.to_numeric(np.asarray(values, dtype=object), errors='coerce')
+
+
+def build_card_batch(raw: dict, first_id: int = 0) -> CardBatch:
+    """
+    Limpia las columnas crudas y arma un CardBatch (una columna por array)
+    """
+    n_rows = len(raw['Name'])
+    if n_rows == 0:
+        return CardBatch.empty()
+
+    columns = {
+        'player_id': np.arange(first_id, first_id + n_rows),
+        'club_league_name': np.asarray(raw['club_league_name'], dtype=object),
+        'preferred_foot': np.asarray(raw['preferred_foot'], dtype=object),
+        'positions': np.asarray([_clean_positions(main, side) for main, side
+                                 in zip(raw['Position'], raw['Side Position'])], dtype=object),
+        # "182cm | 5'11\"" -> 182, "75kg" -> 75
+        'height_cm': _to_numeric([body.split('|')[0].strip().replace('cm', '') for body in raw['Body Type']]),
+        'weight_kg': _to_numeric([weight.replace('kg', '') for weight in raw['weight_kg']]),
+    }
+    for col in ['weak_foot', 'skill_moves', 'overall_rating', 'age', 'pace', 'shooting',
+                'passing', 'dribbling', 'defending', 'physic']:
+        columns[col] = _to_numeric(raw[col])
+    for col in META_COLUMNS:
+        columns[col] = np.asarray(raw[col], dtype=object)
+    return CardBatch(columns)
+
+
+def fetch_html(url: str) -> str:
+    request = urllib.request.Request(url, headers={"User-Agent": HTTP_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.read().decode(charset, errors="replace")
+
+
+def iter_html_chunks(url: str):
+    """
+    Devuelve el cuerpo de la respuesta en pedazos, a medida que llega
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": HTTP_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+        while True:
+            chunk = response.read1(HTTP_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def wait_for_rows(driver, waiter=page_wait):
+    """
+    Espera a que aparezcan las filas de resultados en lugar de dormir un
+    tiempo fijo. Devuelve False si se agotó el timeout.
+    """
+    timeout = waiter.timeout()
+    start = time.perf_counter()
+    try:
+        with stage("page_wait"):
+            WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+                lambda d: d.execute_script(_PAGE_READY_JS))
+    except TimeoutException:
+        waiter.observe(timeout)
+        logger.warning("La página no cargó a tiempo", extra={"timeout": round(timeout, 2)})
+        return False
+    waiter.observe(time.perf_counter() - start)
+    return True
+
+
+def _scrape_with_browser(link: str, pool, mode: str) -> dict:
+    with pool.session() as driver:
+        with stage("driver_get"):
+            driver.get(link)
+        wait_for_rows(driver)
+
+        if mode != "selenium" and parser_available():
+            try:
+                # Un solo round-trip: todo el HTML y se parsea local
+                with stage("page_source"):
+                    html = driver.page_source
+                with stage("parse_html"):
+                    return parse_player_rows(html, FUTBIN_BASE_URL)
+            except FutbinParseError as e:
+                logger.warning("No se pudo parsear el HTML, se usa Selenium", extra={"error": str(e)})
+        with stage("dom_extract"):
+            return extract_rows_with_selenium(driver)
+
+
+def fetch_page_rows(player_name: str, page: int = 1, pool=None, mode=None, before_request=None) -> dict:
+    """
+    Filas crudas de una página de resultados de futbin.
+
+    `before_request(url)` se llama antes de cada request a futbin, también
+    antes del respaldo con el navegador (el crawler pasa su rate limiter)
+    """
+    mode = mode or FUTBIN_FETCH_MODE
+    link = build_search_url(player_name, page)
+
+    if mode == "http" and parser_available():
+        try:
+            if before_request is not None:
+                before_request(link)
+            with stage("http_fetch"):
+                html = fetch_html(link)
+            with stage("parse_html"):
+                raw = parse_player_rows(html, FUTBIN_BASE_URL)
+            if raw['Name']:
+                return raw
+            logger.info("GET sin resultados, se reintenta con el navegador", extra={"player": player_name})
+        except (OSError, FutbinParseError) as e:
+            logger.warning("Falló el GET directo, se usa el navegador", extra={"error": str(e)})
+
+    if before_request is not None:
+        before_request(link)
+    # Se usa un Chrome ya iniciado del pool en lugar de lanzar uno nuevo
+    return _scrape_with_browser(link, pool or get_browser_pool(), mode)
+
+
+def _new_row_indices(raw, seen_links):
+    """
+    Índices de las filas con links que no estaban en `seen_links` (que se actualiza)
+    """
+    # Si se pide una página de más futbin repite la última: se saltean cartas ya vistas
+    new_rows = [i for i, link in enumerate(raw['link']) if link is None or link not in seen_links]
+    seen_links.update(link for link in raw['link'] if link is not None)
+    return new_rows
+
+
+def collect_pages(fetch_page, max_pages=FUTBIN_MAX_PAGES) -> dict:
+    """
+    Junta las filas de hasta `max_pages` páginas (`fetch_page(n)` devuelve las
+    filas crudas de la página n). Se corta en la primera página incompleta.
+    """
+    columns = {col: [] for col in RAW_COLUMNS}
+    seen_links = set()
+    for page in range(1, max_pages + 1):
+        raw = fetch_page(page)
+        new_rows = _new_row_indices(raw, seen_links)
+        for col in RAW_COLUMNS:
+            values = raw[col]
+            columns[col].extend(values[i] for i in new_rows)
+        if len(raw['Name']) < FUTBIN_PAGE_SIZE or not new_rows:
+            break
+    return columns
+
+
+def get_player_data_from_futbin(player_name: str, pool=None, mode=None,
+                                max_pages=FUTBIN_MAX_PAGES) -> CardBatch:
+    if max_pages <= 1:
+        raw = fetch_page_rows(player_name, 1, pool, mode)
+    else:
+        raw = collect_pages(lambda page: fetch_page_rows(player_name, page, pool, mode), max_pages)
+    with stage("build_cards"):
+        return build_card_batch(raw)
+
+
+def _card_batches(rows, batch_size, first_id=0):
+    """
+    Agrupa filas crudas en CardBatch de hasta `batch_size` cartas
+    """
+    pending = []
+    next_id = first_id
+    for row in rows:
+        pending.append(row)
+        if len(pending) >= batch_size:
+            yield build_card_batch(rows_to_columns(pending), next_id)
+            next_id += len(pending)
+            pending = []
+    if pending:
+        yield build_card_batch(rows_to_columns(pending), next_id)
+
+
+class _TimedIterator:
+    """
+    Iterador que acumula en `seconds` lo que tarda cada next(), sin contar
+    el tiempo que el consumidor pasa con cada elemento
+    """
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _iter_first_page_rows(player_name, pool, mode):
+    """
+    Filas crudas de la primera página de resultados, a medida que se parsean
+    """
+    link = build_search_url(player_name)
+
+    if mode == "http" and parser_available():
+        yielded = False
+        chunks = _TimedIterator(iter_html_chunks(link))
+        rows = _TimedIterator(iter_player_rows(chunks, FUTBIN_BASE_URL))
+        try:
+            for row in rows:
+                yielded = True
+                yield row
+            if yielded:
+                return
+            logger.info("GET sin resultados, se reintenta con el navegador", extra={"player": player_name})
+        except (OSError, FutbinParseError) as e:
+            if yielded:
+                raise
+            logger.warning("Falló el GET directo, se usa el navegador", extra={"error": str(e)})
+        finally:
+            # El parser va pidiendo los bytes: lo que no es lectura de la red es parseo
+            record("http_fetch", chunks.seconds)
+            record("parse_html", rows.seconds - chunks.seconds)
+
+    pool = pool or get_browser_pool()
+    if mode != "selenium" and parser_available():
+        # El navegador se devuelve al pool antes de parsear
+        with pool.session() as driver:
+            with stage("driver_get"):
+                driver.get(link)
+            wait_for_rows(driver)
+            with stage("page_source"):
+                html = driver.page_source
+        yielded = False
+        try:
+            for row in iter_player_rows([html], FUTBIN_BASE_URL):
+                yielded = True
+                yield row
+            return
+        except FutbinParseError as e:
+            if yielded:
+                raise
+            logger.warning("No se pudo parsear el HTML, se usa Selenium", extra={"error": str(e)})
+
+    raw = _scrape_with_browser(link, pool, "selenium")
+    for values in zip(*(raw[col] for col in RAW_COLUMNS)):
+        yield dict(zip(RAW_COLUMNS, values))
+
+
+def iter_player_cards(player_name: str, pool=None, mode=None, batch_size=STREAM_BATCH_SIZE,
+                      max_pages=FUTBIN_MAX_PAGES):
+    """
+    Como get_player_data_from_futbin, pero devuelve las cartas en tandas
+    (CardBatch) apenas se parsean sus filas, así se puede ir prediciendo
+    mientras llega el resto de la página.
+
+    La primera página se procesa en streaming; las siguientes (hasta
+    `max_pages`, con el mismo corte que collect_pages) salen en una tanda cada una.
+    """
+    mode = mode or FUTBIN_FETCH_MODE
+    seen_links = set()
+    first_page = []
+
+    def track(rows):
+        for row in rows:
+            first_page.append(row['link'])
+            yield row
+
+    yield from _card_batches(track(_iter_first_page_rows(player_name, pool, mode)), batch_size)
+    next_id = len(first_page)
+    _new_row_indices({'link': first_page}, seen_links)
+    if len(first_page) < FUTBIN_PAGE_SIZE:
+        return
+
+    for page in range(2, max_pages + 1):
+        raw = fetch_page_rows(player_name, page, pool, mode)
+        new_rows = _new_row_indices(raw, seen_links)
+        if new_rows:
+            yield build_card_batch({col: [raw[col][i] for i in new_rows] for col in RAW_COLUMNS}, next_id)
+            next_id += len(new_rows)
+        if len(raw['Name']) < FUTBIN_PAGE_SIZE or not new_rows:
+            break
@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import contextmanager
+
+
+class SingleFlight:
+    """
+    Deduplica trabajo concurrente por clave.
+
+    Mientras haya una llamada en curso para una clave, las siguientes no
+    lanzan otra sino que esperan el mismo resultado (o la misma excepción).
+    Si todos los que esperan se cancelan, también se cancela el trabajo.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.stats = {"leaders": 0, "followers": 0}
+
+    def _forget(self, key, task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        # Evita el warning de "exception was never retrieved" si nadie quedó esperando
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, coro_factory):
+        """
+        Devuelve el resultado de `coro_factory()` compartido entre los llamados
+        concurrentes con la misma clave
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(coro_factory())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["followers"] += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # shield: cancelar a un solo cliente no cancela el trabajo compartido
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def running(self, key):
+        """
+        True si hay una llamada en curso para `key`
+        """
+        return key in self._inflight
+
+    def in_flight(self):
+        return len(self._inflight)
+
+
+class SharedResults:
+    """
+    Como SingleFlight, para trabajo que el líder consume por partes (p. ej.
+    un scrape en streaming): los demás esperan el resultado completo.
+
+    Si el líder falla, los que esperan reciben la misma excepción; si se
+    corta (cliente desconectado) reciben None y pueden intentar ellos.
+    """
+
+    def __init__(self):
+        self._futures = {}
+        self.stats = {"leaders": 0, "followers": 0}
+
+    def running(self, key):
+        return key in self._futures
+
+    async def wait(self, key):
+        """
+        Resultado del líder en curso para `key`, o None si no hay o si se cortó
+        """
+        future = self._futures.get(key)
+        if future is None:
+            return None
+        self.stats["followers"] += 1
+        # shield: cancelar a uno de los que esperan no cancela el resultado compartido
+        return await asyncio.shield(future)
+
+    @contextmanager
+    def lead(self, key):
+        """
+        Registra al líder de `key`; dentro del bloque tiene que llamar a
+        `future.set_result(...)` con el resultado completo
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        self.stats["leaders"] += 1
+        try:
+            yield future
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+            if not future.done():
+                future.set_result(None)
+            # Evita el warning de "exception was never retrieved" si nadie quedó esperando
+            future.exception()
@@ -0,0 +1,202 @@
+"""
+Archivos del frontend: index.html en memoria y assets precomprimidos.
+
+`npm run build` deja en frontend/build/static archivos con hash en el nombre,
+así que nunca cambian y se pueden cachear para siempre. Después del build
+start.sh corre
+
+    python backend/static_files.py frontend/build
+
+que escribe al lado de cada .js/.css/... su versión .gz (y .br si está
+instalado el paquete `brotli`). PrecompressedStaticFiles elige la variante
+según Accept-Encoding sin comprimir nada en el request.
+
+El index.html se lee una vez, se comprime en memoria y se vuelve a leer solo
+si cambia su mtime (un build nuevo con el servidor levantado).
+"""
+import argparse
+import gzip
+import mimetypes
+import os
+import threading
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+from http_cache import http_date, is_not_modified, make_etag, not_modified_response
+from log_config import get_logger
+
+logger = get_logger("static")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.js', '.css', '.json', '.map', '.svg', '.txt', '.ico', '.xml'}
+MIN_COMPRESS_BYTES = 256
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# El index.html referencia los assets del build actual: se revalida siempre
+INDEX_CACHE_CONTROL = "no-cache"
+
+
+def accepted_encodings(header):
+    """
+    Codificaciones aceptadas según Accept-Encoding (las que tienen q=0 no cuentan)
+    """
+    encodings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name)
+    return encodings
+
+
+def _choose_encoding(header, available):
+    accepted = accepted_encodings(header)
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def _compress(data):
+    variants = {"gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+class IndexHtml:
+    """
+    index.html en memoria con sus variantes comprimidas, Last-Modified y un
+    ETag por codificación (cada cuerpo distinto tiene el suyo)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # (mtime, {codificación o None: (cuerpo, etag)}), se reemplaza entero al recargar
+        self._current = None
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        current = self._current
+        if current is not None and current[0] == mtime:
+            return current
+        with self._lock:
+            if self._current is None or self._current[0] != mtime:
+                with open(self.path, 'rb') as f:
+                    body = f.read()
+                variants = {None: body, **_compress(body)}
+                self._current = (mtime, {encoding: (data, make_etag(data)) for encoding, data in variants.items()})
+                logger.info("index.html cargado en memoria", extra={"path": str(self.path), "bytes": len(body)})
+            return self._current
+
+    def response(self, request_headers):
+        """
+        Respuesta para el request, o None si el index.html no existe
+        """
+        current = self._load()
+        if current is None:
+            return None
+        mtime, variants = current
+        encoding = _choose_encoding(request_headers.get("accept-encoding"), variants)
+        body, etag = variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(mtime / 1e9),
+            "Cache-Control": INDEX_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if is_not_modified(request_headers, etag, mtime // 1_000_000_000):
+            return not_modified_response(headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="text/html", headers=headers)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles que sirve `archivo.br` o `archivo.gz` si existen y el cliente
+    los acepta, con Cache-Control de larga duración (los nombres llevan hash)
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        available = {}
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            try:
+                available[encoding] = (full_path + suffix, os.stat(full_path + suffix))
+            except OSError:
+                pass
+
+        encoding = _choose_encoding(request_headers.get("accept-encoding"), available)
+        if encoding is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        else:
+            path, variant_stat = available[encoding]
+            media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+            response = FileResponse(path, status_code=status_code, stat_result=variant_stat,
+                                    media_type=media_type)
+            # El ETag sale del archivo comprimido: cada variante tiene el suyo
+            response.headers["Content-Encoding"] = encoding
+            if self.is_not_modified(response.headers, request_headers):
+                response = not_modified_response({"ETag": response.headers["etag"]})
+
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        if available:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+def precompress(directory):
+    """
+    Escribe .gz (y .br si hay brotli) al lado de cada archivo comprimible;
+    devuelve cuántos archivos se comprimieron
+    """
+    count = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < MIN_COMPRESS_BYTES:
+                continue
+            variants = _compress(data)
+            for encoding, body in variants.items():
+                suffix = ".br" if encoding == "br" else ".gz"
+                with open(path + suffix, 'wb') as f:
+                    f.write(body)
+            count += bool(variants)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomprime los archivos del build del frontend")
+    parser.add_argument("directory", help="Carpeta del build (p. ej. frontend/build)")
+    args = parser.parse_args()
+
+    count = precompress(args.directory)
+    print(f"✅ {count} archivos precomprimidos en {args.directory}"
+          + ("" if brotli is not None else " (solo gzip: falta el paquete brotli)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def model_components():
+    """
+    Modelo de producción desde el artefacto (sin pickle)
+    """
+    from model_utils import load_model_components
+
+    components = load_model_components(os.path.join(BACKEND_DIR, "model_artifact"))
+    assert components is not None
+    return components
@@ -0,0 +1,47 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+import futbin_parser
+from cache import ScrapeCache, normalize_player_name
+from cards import CardBatch
+from futbin_parser import parse_player_rows
+from scrapper import build_card_batch
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "fixtures", "futbin_players.html")
+
+
+def _cache(path):
+    return ScrapeCache(db_path=str(path), encode=CardBatch.to_json, decode=CardBatch.from_json)
+
+
+@pytest.mark.skipif(futbin_parser.lxml is None, reason="lxml no está instalado")
+def test_disk_tier_round_trip(tmp_path):
+    with open(FIXTURE, encoding='utf-8') as f:
+        cards = build_card_batch(parse_player_rows(f.read()))
+    cache = _cache(tmp_path / "cache.db")
+    cache.set("Kylian Mbappé", cards)
+    cache.close()
+
+    cache = _cache(tmp_path / "cache.db")
+    cached, state = cache.get("Kylian Mbappé")
+    assert state == "fresh"
+    assert cached.to_records() == cards.to_records()
+    cache.close()
+
+
+def test_legacy_list_entry_is_a_miss(tmp_path):
+    path = tmp_path / "cache.db"
+    _cache(path).close()
+    # Formato anterior a CardBatch: una lista de dicts
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO scrape_cache (key, stored_at, payload) VALUES (?, ?, ?)",
+                     (normalize_player_name("Messi"), time.time(), json.dumps([{"Name": "Lionel Messi"}])))
+
+    cache = _cache(path)
+    assert cache.get("Messi")[0] is None
+    cache.close()
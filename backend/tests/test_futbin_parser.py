@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import futbin_parser
+from futbin_parser import RAW_COLUMNS, iter_player_rows, parse_player_rows, rows_to_columns
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "fixtures", "futbin_players.html")
+
+# Página guardada de futbin: tres cartas de Mbappé
+EXPECTED_FIRST_ROW = {
+    'Name': 'Kylian Mbappé', 'overall_rating': '91', 'Position': 'ST', 'Side Position': 'LW, LM++',
+    'price': '1.23M', 'weak_foot': '4', 'skill_moves': '5', 'pace': '97', 'shooting': '90',
+    'passing': '80', 'dribbling': '92', 'defending': '36', 'physic': '78',
+    'Body Type': '182cm | 5\'11"Unique', 'age': '26', 'weight_kg': '75kg', 'preferred_foot': 'Right',
+    'club_league_name': 'LALIGA EA SPORTS', 'card': 'Rare',
+    'link': 'https://www.futbin.com/25/player/40/kylian-mbappe',
+}
+
+needs_lxml = pytest.mark.skipif(futbin_parser.lxml is None, reason="lxml no está instalado")
+
+
+@pytest.fixture(scope="module")
+def html():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+@needs_lxml
+def test_parse_player_rows(html):
+    raw = parse_player_rows(html.decode('utf-8'))
+    assert list(raw) == RAW_COLUMNS
+    assert {col: values[0] for col, values in raw.items()} == EXPECTED_FIRST_ROW
+    assert raw['card'] == ['Rare', 'TOTY', 'Team of the Week']
+    assert raw['overall_rating'] == ['91', '94', '92']
+    assert raw['Side Position'] == ['LW, LM++', 'LW', '']
+    assert raw['preferred_foot'] == ['Right', 'Right', 'Left']
+
+
+@needs_lxml
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096, None])
+def test_iter_player_rows_matches_parse(html, chunk_size):
+    # Cortes arbitrarios del HTML (hasta de a un byte) tienen que dar las mismas filas
+    chunks = [html] if chunk_size is None else [html[i:i + chunk_size] for i in range(0, len(html), chunk_size)]
+    rows = list(iter_player_rows(chunks))
+    assert rows[0] == EXPECTED_FIRST_ROW
+    assert rows_to_columns(rows) == parse_player_rows(html.decode('utf-8'))
@@ -0,0 +1,51 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference_engine import FoldedBoosterModel, ScaledBoosterModel, native_model
+from model_registry import DEFAULT_PICKLE
+from model_utils import load_model_components
+
+
+@pytest.fixture(scope="module")
+def pickle_components():
+    # El pickle es de otra versión de scikit-learn/XGBoost: avisa al cargarlo
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        components = load_model_components(DEFAULT_PICKLE)
+    if components is None or components.get('pipeline') is None:
+        pytest.skip("No se pudo cargar el Pipeline del pickle")
+    return components
+
+
+@pytest.fixture(scope="module")
+def features(pickle_components):
+    """
+    Matriz fija alrededor de las medias del escalador, con valores enteros
+    (como las features reales) para que muchos caigan justo sobre los cortes
+    """
+    scaler = pickle_components['pipeline'].named_steps['scaler']
+    rng = np.random.default_rng(0)
+    X = scaler.mean_ + 2 * scaler.scale_ * rng.standard_normal((5000, len(scaler.mean_)))
+    return np.round(X).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def expected(pickle_components, features):
+    pipeline = pickle_components['pipeline']
+    return pipeline.predict(pd.DataFrame(features.astype(np.float64), columns=pickle_components['feature_columns']))
+
+
+@pytest.mark.parametrize("engine, cls", [("scaled", ScaledBoosterModel), ("folded", FoldedBoosterModel)])
+def test_engine_matches_pipeline(pickle_components, features, expected, engine, cls):
+    model = native_model(pickle_components['pipeline'], engine)
+    assert isinstance(model, cls)
+    np.testing.assert_array_equal(model.predict(features), expected)
+
+
+def test_artifact_matches_pipeline(model_components, features, expected):
+    np.testing.assert_array_equal(model_components['model'].predict(features), expected)
+    folded = native_model(model_components['model'], "folded")
+    np.testing.assert_array_equal(folded.predict(features), expected)
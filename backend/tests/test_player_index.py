@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from model_utils import predict_prices
+from player_index import PlayerIndex, build_index
+
+PLAYER = {
+    'player_id': 1, 'preferred_foot': 'Right', 'positions': 'ST, LW', 'height_cm': 182, 'weight_kg': 75,
+    'weak_foot': 4, 'skill_moves': 5, 'overall_rating': 91, 'age': 26, 'pace': 97, 'shooting': 90,
+    'passing': 80, 'dribbling': 92, 'defending': 36, 'physic': 78,
+}
+
+
+def test_build_index_maps_full_league_names(tmp_path, model_components):
+    data = pd.DataFrame([{**PLAYER, 'name': 'Kylian Mbappé', 'club_league_name': 'La Liga'},
+                         {**PLAYER, 'player_id': 2, 'name': 'Otro Jugador', 'club_league_name': 'Liga Inventada'}])
+    index = PlayerIndex(build_index(data, model_components, tmp_path / "index"))
+
+    fifa = predict_prices(pd.DataFrame([{**PLAYER, 'club_league_name': 'LALIGA EA SPORTS'}]), model_components)
+    other = predict_prices(pd.DataFrame([{**PLAYER, 'club_league_name': 'Liga Inventada'}]), model_components)
+    assert fifa[0] != other[0]
+
+    la_liga, unknown = index.records(index.exact_rows("kylian mbappe") + index.exact_rows("otro jugador"))
+    assert la_liga['predicted_price'] == pytest.approx(float(fifa[0]), rel=1e-6)
+    assert la_liga['club_league_name'] == 'LALIGA EA SPORTS'
+    assert unknown['predicted_price'] == pytest.approx(float(other[0]), rel=1e-6)
+
+
+def test_build_index_requires_names(tmp_path, model_components):
+    with pytest.raises(ValueError):
+        build_index(pd.DataFrame([PLAYER]), model_components, tmp_path / "index")
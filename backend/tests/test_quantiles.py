@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from model_utils import _split_quantiles, band_columns
+
+
+@pytest.mark.parametrize("quantiles", [[0.1, 0.5, 0.9], [0.9, 0.1, 0.5]])
+def test_bands_follow_sorted_quantiles(quantiles):
+    # Salidas cruzadas: se ordenan por fila y se nombran de menor a mayor cuantil
+    raw = np.array([[10.0, 1.0, 5.0], [2.0, 12.0, 6.0]])
+    components = {'quantiles': quantiles}
+    point, bands = _split_quantiles(raw, components)
+
+    assert band_columns(components) == ['predicted_price_p10', 'predicted_price_p90']
+    np.testing.assert_array_equal(point, [5.0, 6.0])
+    np.testing.assert_array_equal(bands['predicted_price_p10'], [1.0, 2.0])
+    np.testing.assert_array_equal(bands['predicted_price_p90'], [10.0, 12.0])
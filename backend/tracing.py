@@ -0,0 +1,187 @@
+"""
+Tiempos por etapa de cada request y métricas en formato Prometheus.
+
+Cada request abre un Trace (guardado en un contextvar) y el código marca sus
+etapas con `stage`:
+
+    with stage("driver_get"):
+        driver.get(link)
+
+La duración se suma al Trace del request (que termina en el header
+Server-Timing) y a un histograma global que se expone en /metrics. Fuera de
+un request `stage` solo alimenta el histograma. run_in_pool copia el
+contexto, así las etapas que corren en los pools se anotan en el request que
+las pidió.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Cortes en segundos: desde parsear HTML (ms) hasta un scrape lento con Chrome
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [conteo por bucket (no acumulado), suma, conteo total]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram("fifa_request_duration_seconds",
+                             "Duración de los requests HTTP", ("path",))
+REQUESTS_TOTAL = Counter("fifa_requests_total", "Requests HTTP atendidos", ("path", "status"))
+STAGE_DURATION = Histogram("fifa_stage_duration_seconds",
+                           "Duración de cada etapa del pipeline de predicción", ("stage",))
+_METRICS = [REQUEST_DURATION, REQUESTS_TOTAL, STAGE_DURATION]
+
+
+def render_metrics(extra_lines=()):
+    """
+    Todas las métricas en formato de texto de Prometheus
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+def metric_lines(name, help, value, kind="gauge"):
+    """
+    Una métrica suelta, para valores que ya lleva otro módulo (p. ej. el cache)
+    """
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"]
+
+
+class Trace:
+    """
+    Duraciones por etapa de un request (en segundos, acumuladas por nombre)
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        # Las etapas pueden venir de los threads de los pools
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        """
+        Valor del header Server-Timing (duraciones en ms)
+        """
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current_trace = ContextVar("fifa_trace", default=None)
+
+
+def start_trace():
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def record(name, seconds):
+    STAGE_DURATION.observe(seconds, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def stage(name):
+    """
+    Mide el bloque como la etapa `name` del request actual
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
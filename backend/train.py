@@ -0,0 +1,360 @@
+"""
+Entrenamiento reproducible del modelo (lo que antes se hacía a mano en fifa.ipynb).
+
+    python train.py                                  # escribe en artifacts/<fecha>
+    python train.py --raw jugadores.csv --iterations 40 --jobs 8
+    python train.py --raw nuevos.csv --warm-start model_artifact --rounds 100
+    python train.py --output model_artifact          # reemplaza el modelo de producción
+
+Etapas:
+
+    load_data   baja el dataset de Kaggle (kagglehub, opcional; o --raw),
+                lo limpia y lo une con player-data-full.csv. El resultado se
+                guarda en Parquet y se reutiliza mientras los CSV no cambien
+    features    vocabularios (top ligas, posiciones), medianas y matriz con el
+                mismo PreprocessPlan que usa la API
+    search      RandomizedSearch en paralelo (un proceso por core) con early
+                stopping contra el set de validación
+    warm_start  en vez de search: sigue sumando árboles a un modelo existente
+                con los datos nuevos (xgb_model), con sus mismos vocabularios
+    evaluate    métricas sobre el set de test con predict_prices
+    export      escribe el artefacto que carga la API (model_artifact.py)
+
+Al final imprime un JSON con el tiempo de cada etapa, las métricas y los
+hiperparámetros.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from scipy.stats import randint, uniform
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, RandomizedSearchCV, train_test_split
+
+from inference_engine import ScaledBoosterModel, fitted_booster, native_model, regressor_params, training_params
+from log_config import get_logger
+from model_artifact import export_artifact
+from model_registry import ARTIFACTS_DIR
+from model_utils import (BINARY_COL, LEAGUE_COL, SPECIAL_MULTI_COL, PreprocessPlan, _point_quantile_index,
+                         league_mapping, load_model_components, predict_prices,
+                         with_fifa_league_names)
+from tracing import end_trace, stage, start_trace
+
+logger = get_logger("train")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+KAGGLE_DATASET = "aniss7/fifa-player-data-from-sofifa-2025-06-03"
+KAGGLE_CSV = "player-data-full-2025-june.csv"
+EXTRA_CSV = os.path.join(_BACKEND_DIR, "player-data-full.csv")
+TRAIN_CACHE_DIR = os.getenv("FIFA_TRAIN_CACHE_DIR", os.path.join(_BACKEND_DIR, ".train_cache"))
+CACHE_VERSION = 1  # Subirlo si cambia la limpieza, para no reutilizar un Parquet viejo
+
+TARGET_COL = 'value'
+RAW_NUMERIC = ['height_cm', 'weight_kg', 'weak_foot', 'skill_moves', 'overall_rating', 'player_id']
+TOP_LEAGUES = 14
+SEED = 15
+
+# Mismo espacio que en el notebook; n_estimators es un máximo porque corta el early stopping
+PARAM_DISTRIBUTIONS = {
+    'learning_rate': uniform(0.01, 0.2),
+    'max_depth': randint(3, 9),
+    'min_child_weight': randint(4, 15),
+    'subsample': uniform(0.7, 0.3),
+    'colsample_bytree': uniform(0.7, 0.3),
+    'gamma': uniform(0, 3),
+}
+
+
+def download_dataset():
+    """
+    CSV del dataset de Kaggle (necesita kagglehub y credenciales)
+    """
+    try:
+        import kagglehub
+    except ImportError:
+        raise SystemExit("Falta kagglehub (pip install kagglehub) o pasá el CSV con --raw")
+    return os.path.join(kagglehub.dataset_download(KAGGLE_DATASET), KAGGLE_CSV)
+
+
+def parse_value(values):
+    """
+    '€1.5M' -> 1500000, '€800K' -> 800000; lo que no se entiende queda en NaN
+    """
+    text = values.astype(str).str.replace('€', '', regex=False).str.replace(',', '', regex=False).str.strip()
+    multiplier = np.where(text.str.endswith('M'), 1_000_000, np.where(text.str.endswith('K'), 1_000, 1))
+    number = pd.to_numeric(text.str.rstrip('MK'), errors='coerce')
+    return number * multiplier
+
+
+def clean_raw(data):
+    """
+    Misma limpieza que el notebook: sin arqueros, solo las columnas que usa el
+    modelo, numéricas convertidas y sin filas incompletas
+    """
+    data = data[~data[SPECIAL_MULTI_COL].str.contains('GK', na=False)]
+    data = data[[TARGET_COL, LEAGUE_COL, BINARY_COL, SPECIAL_MULTI_COL] + RAW_NUMERIC].copy()
+    for col in RAW_NUMERIC:
+        data[col] = pd.to_numeric(data[col], errors='coerce')
+    data[TARGET_COL] = parse_value(data[TARGET_COL])
+    return data.dropna()
+
+
+def merge_extra(data, extra):
+    """
+    Suma las columnas de player-data-full.csv (edad, ritmo, tiro...) por player_id
+    """
+    extra = extra.copy()
+    extra['player_id'] = pd.to_numeric(extra['player_id'], errors='coerce')
+    extra = extra.dropna(subset=['player_id']).drop_duplicates('player_id')
+    data['player_id'] = data['player_id'].astype('int64')
+    extra['player_id'] = extra['player_id'].astype('int64')
+    merged = data.merge(extra, on='player_id', how='left', indicator=True)
+    missing = int((merged['_merge'] == 'left_only').sum())
+    if missing:
+        logger.info("Jugadores sin datos extra (se descartan)", extra={"rows": missing})
+    merged = merged.drop(columns=['_merge', 'player_id']).dropna().drop_duplicates()
+    return merged.reset_index(drop=True)
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_dataset(raw_path, extra_path=EXTRA_CSV, cache_dir=TRAIN_CACHE_DIR):
+    """
+    Dataset limpio y unido, desde el cache Parquet si los CSV no cambiaron
+    """
+    key = hashlib.sha256(f"{CACHE_VERSION}|{_file_key(raw_path)}|{_file_key(extra_path)}".encode()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"dataset-{key[:16]}.parquet") if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        logger.info("Dataset desde cache", extra={"path": cache_path})
+        return pd.read_parquet(cache_path)
+
+    data = merge_extra(clean_raw(pd.read_csv(raw_path, low_memory=False)), pd.read_csv(extra_path))
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            data.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, cache_path)
+        except ImportError:
+            logger.warning("Sin pyarrow: el dataset no se guarda en cache")
+    return data
+
+
+def build_components(train, quantiles=None):
+    """
+    Vocabularios, columnas y medianas a partir del set de entrenamiento, con
+    el mismo formato que el manifest del artefacto
+    """
+    league_value = train.groupby(LEAGUE_COL)[TARGET_COL].sum().sort_values(ascending=False)
+    top_leagues = sorted(set(league_value.head(TOP_LEAGUES).index) | {'Other'})
+    unmapped = [league for league in top_leagues if league != 'Other' and league not in league_mapping]
+    if unmapped:
+        # La API recibe el nombre de FIFA: sin mapeo esas ligas nunca tendrían su columna
+        logger.warning("Ligas sin mapeo en league_mapping", extra={"leagues": unmapped})
+
+    position_classes = sorted({pos.strip() for value in train[SPECIAL_MULTI_COL] for pos in value.split(',')})
+    base_cols = [col for col in train.columns if col not in (TARGET_COL, LEAGUE_COL, SPECIAL_MULTI_COL)]
+    numeric_cols = [col for col in base_cols if col != BINARY_COL]
+
+    return {
+        'onehot_encoders': {},
+        'mlb': None,
+        # drop='first' como el OneHotEncoder del notebook: la primera categoría no tiene columna
+        'onehot_categories': {LEAGUE_COL: top_leagues},
+        'position_classes': position_classes,
+        'feature_columns': (base_cols + [f"{LEAGUE_COL}_{league}" for league in top_leagues[1:]]
+                            + [f"pos_{cls}" for cls in position_classes]),
+        'feature_medians': {col: float(train[col].median()) for col in numeric_cols},
+        'target_col': TARGET_COL,
+        'model_type': 'Pipeline',
+        'top_leagues': top_leagues,
+        'quantiles': sorted(quantiles) if quantiles else None,
+    }
+
+
+def serving_frame(data):
+    """
+    El dataset usa el nombre completo de la liga y el scraping el de FIFA:
+    se pasa al de FIFA para que el preprocesamiento sea el mismo que en la API
+    """
+    return with_fifa_league_names(data)
+
+
+def to_features(data, components):
+    return PreprocessPlan(components).transform(serving_frame(data))
+
+
+def _point_predictions(predictions, quantiles):
+    predictions = np.asarray(predictions)
+    if predictions.ndim == 2:
+        return predictions[:, _point_quantile_index(quantiles)]
+    return predictions
+
+
+def _objective(quantiles):
+    if not quantiles:
+        return {'objective': 'reg:squarederror'}
+    # Una hoja vectorial por árbol: los cuantiles cuestan poco más que una salida
+    # (ver benchmarks/quantile_cost.py)
+    return {'objective': 'reg:quantileerror', 'quantile_alpha': np.asarray(quantiles),
+            'multi_strategy': 'multi_output_tree'}
+
+
+def search(X_train, y_train, X_val, y_val, iterations, folds, jobs, max_rounds, early_stopping,
+           quantiles=None, seed=SEED):
+    """
+    RandomizedSearchCV sobre XGBRegressor, con early stopping en cada ajuste
+
+    Los candidatos corren en paralelo (`jobs` procesos) y cada XGBoost usa un
+    solo thread para no pelearse por los cores.
+    """
+    regressor = xgb.XGBRegressor(n_estimators=max_rounds, early_stopping_rounds=early_stopping,
+                                 tree_method='hist', random_state=seed, n_jobs=1, **_objective(quantiles))
+
+    def score(estimator, X, y):
+        return -mean_squared_error(y, _point_predictions(estimator.predict(X), quantiles))
+
+    rs = RandomizedSearchCV(regressor, PARAM_DISTRIBUTIONS, n_iter=iterations, scoring=score,
+                            cv=KFold(n_splits=folds, shuffle=True, random_state=seed),
+                            random_state=seed, n_jobs=jobs)
+    rs.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    best = rs.best_estimator_
+    return best, {"best_params": {k: (v.item() if hasattr(v, 'item') else v) for k, v in rs.best_params_.items()},
+                  "cv_rmse": float(np.sqrt(-rs.best_score_)), "candidates": iterations}
+
+
+def warm_start(base, X_train, y_train, X_val, y_val, rounds, early_stopping, jobs):
+    """
+    Suma hasta `rounds` árboles al booster de `base` entrenando con los datos nuevos
+    """
+    scaled = native_model(base.get('pipeline', base['model']), "scaled")
+    if not isinstance(scaled, ScaledBoosterModel):
+        raise SystemExit("El modelo base no es un booster de XGBoost con StandardScaler")
+    params = training_params(base)
+    if not params:
+        raise SystemExit("El modelo base no guarda sus hiperparámetros: exportalo de nuevo con model_artifact.py")
+    previous_rounds = scaled.booster.num_boosted_rounds()
+    regressor = xgb.XGBRegressor(n_estimators=rounds, early_stopping_rounds=early_stopping, tree_method='hist',
+                                 random_state=SEED, n_jobs=jobs, **_objective(base.get('quantiles')), **params)
+
+    def scale(X):
+        return (X.astype(np.float64) - scaled.mean) / scaled.scale
+
+    regressor.fit(scale(X_train), y_train, eval_set=[(scale(X_val), y_val)], verbose=False,
+                  xgb_model=scaled.booster)
+    model = ScaledBoosterModel(fitted_booster(regressor), scaled.mean, scaled.scale)
+    return model, params, {"previous_rounds": previous_rounds,
+                           "added_rounds": model.booster.num_boosted_rounds() - previous_rounds}
+
+
+def evaluate(test, components):
+    predictions = np.maximum(predict_prices(serving_frame(test), components), 0)
+    y = test[TARGET_COL].to_numpy()
+    return {"r2": float(r2_score(y, predictions)), "mae": float(mean_absolute_error(y, predictions)),
+            "rmse": float(np.sqrt(mean_squared_error(y, predictions))), "rows": len(y)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo y exporta el artefacto")
+    parser.add_argument("--raw", help="CSV de sofifa (por defecto se baja de Kaggle con kagglehub)")
+    parser.add_argument("--extra", default=EXTRA_CSV, help="CSV con edad y atributos por player_id")
+    parser.add_argument("--cache-dir", default=TRAIN_CACHE_DIR, help="Cache Parquet del dataset ('' lo desactiva)")
+    parser.add_argument("-o", "--output", help="Directorio del artefacto (por defecto artifacts/<fecha>)")
+    parser.add_argument("--iterations", type=int, default=90, help="Candidatos del RandomizedSearch")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="Procesos en paralelo (-1: uno por core)")
+    parser.add_argument("--max-rounds", type=int, default=2000, help="Máximo de árboles por candidato")
+    parser.add_argument("--early-stopping", type=int, default=50, help="Rondas sin mejora antes de cortar")
+    parser.add_argument("--quantiles", type=float, nargs="+", help="Entrena cuantiles (p. ej. 0.1 0.5 0.9)")
+    parser.add_argument("--warm-start", help="Modelo (artefacto o pickle) al que sumarle árboles")
+    parser.add_argument("--rounds", type=int, default=100, help="Máximo de árboles nuevos con --warm-start")
+    parser.add_argument("--report", help="Guarda el reporte como JSON")
+    args = parser.parse_args()
+    if args.quantiles:
+        if len(set(args.quantiles)) != len(args.quantiles) or not all(0 < q < 1 for q in args.quantiles):
+            parser.error("--quantiles tiene que tener valores distintos entre 0 y 1")
+        # Cada salida del modelo es un cuantil, en orden creciente
+        args.quantiles = sorted(args.quantiles)
+    if args.output is None:
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        args.output = os.path.join(ARTIFACTS_DIR, time.strftime("%Y%m%d-%H%M%S"))
+
+    trace, token = start_trace()
+    try:
+        with stage("load_data"):
+            raw_path = args.raw or download_dataset()
+            data = load_dataset(raw_path, args.extra, args.cache_dir or None)
+            train, test = train_test_split(data, test_size=0.2, random_state=SEED)
+            test, validation = train_test_split(test, test_size=0.25, random_state=SEED)
+            base = None
+            if args.warm_start:
+                base = load_model_components(args.warm_start)
+                if base is None:
+                    raise SystemExit(f"No se pudo cargar {args.warm_start}")
+
+        with stage("features"):
+            if base is None:
+                components = build_components(train, args.quantiles)
+            else:
+                # Mismas columnas y medianas que el modelo base: los árboles viejos las esperan
+                components = {key: base.get(key) for key in (
+                    'onehot_encoders', 'mlb', 'onehot_categories', 'position_classes', 'feature_columns',
+                    'feature_medians', 'target_col', 'model_type', 'top_leagues', 'quantiles')}
+            X_train, X_val = to_features(train, components), to_features(validation, components)
+            y_train, y_val = train[TARGET_COL].to_numpy(), validation[TARGET_COL].to_numpy()
+
+        if base is None:
+            with stage("search"):
+                # El scaler se ajusta una vez con todo el train: a los árboles solo les
+                # importa el orden de los valores, así que no cambia la búsqueda
+                mean = X_train.astype(np.float64).mean(axis=0)
+                scale = X_train.astype(np.float64).std(axis=0)
+                scale[scale == 0] = 1.0
+                regressor, details = search((X_train - mean) / scale, y_train, (X_val - mean) / scale, y_val,
+                                            args.iterations, args.folds, args.jobs, args.max_rounds,
+                                            args.early_stopping, args.quantiles)
+                model = ScaledBoosterModel(fitted_booster(regressor), mean, scale)
+                params = regressor_params(regressor)
+        else:
+            with stage("warm_start"):
+                model, params, details = warm_start(base, X_train, y_train, X_val, y_val, args.rounds,
+                                            args.early_stopping, args.jobs)
+        components['model'] = model
+        components['training_params'] = params
+        components['preprocess_plan'] = PreprocessPlan(components)
+
+        with stage("evaluate"):
+            metrics = evaluate(test, components)
+
+        with stage("export"):
+            manifest = export_artifact(components, args.output)
+    finally:
+        end_trace(token)
+
+    report = {
+        "model_version": manifest["model_version"],
+        "output": os.path.abspath(args.output),
+        "rows": {"train": len(train), "validation": len(validation), "test": len(test)},
+        "rounds": model.booster.num_boosted_rounds(),
+        "metrics": metrics,
+        **details,
+        "timings_s": {name: round(seconds, 3) for name, seconds in trace.stages.items()
+                      if name in ("load_data", "features", "search", "warm_start", "evaluate", "export")},
+        "total_s": round(trace.elapsed(), 3),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
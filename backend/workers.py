@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from browser_pool import POOL_SIZE
+from tracing import record
+
+
+# Tamaño de los pools y límites de admisión (configurables por entorno)
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", str(POOL_SIZE)))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING_REQUESTS = int(os.getenv("MAX_PENDING_REQUESTS", str(SCRAPE_WORKERS * 4)))
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "45"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "10"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+
+
+# El scraping (Selenium, I/O) y la inferencia (CPU) usan pools separados para
+# que unos scrapes lentos no bloqueen las predicciones ni el event loop
+scrape_executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+class Overloaded(Exception):
+    """
+    El servidor tiene demasiados requests pendientes
+    """
+
+    def __init__(self, message, retry_after=RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limita cuántos requests pueden estar en curso a la vez.
+
+    Si se supera el límite se rechaza en el momento en lugar de encolar sin límite.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING_REQUESTS):
+        self.max_pending = max_pending
+        self.in_flight = 0
+
+    def full(self):
+        return self.in_flight >= self.max_pending
+
+    def __enter__(self):
+        # Todo corre en el event loop, así que no hace falta un lock
+        if self.in_flight >= self.max_pending:
+            raise Overloaded(f"Demasiados requests en curso ({self.in_flight})")
+        self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.in_flight -= 1
+        return False
+
+
+async def run_in_pool(executor, timeout, fn, *args):
+    """
+    Ejecuta `fn` en el pool indicado sin bloquear el event loop.
+
+    Si se agota el timeout se cancela la tarea (si todavía no empezó) y se
+    lanza asyncio.TimeoutError. La función corre con una copia del contexto
+    actual, así sus etapas se anotan en el Trace del request.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def run():
+        # Tiempo esperando un worker libre del pool
+        record("queue_wait", time.perf_counter() - submitted)
+        return fn(*args)
+
+    future = loop.run_in_executor(executor, context.run, run)
+    return await asyncio.wait_for(future, timeout=timeout)
+
+
+async def iterate_in_pool(executor, timeout, fn, *args):
+    """
+    Recorre el generador `fn(*args)` en el pool indicado y devuelve sus
+    elementos a medida que se producen (async generator).
+
+    `timeout` es el máximo a esperar por cada elemento. Si quien consume deja
+    de iterar (p. ej. el cliente cortó la conexión), el generador se cierra
+    después del elemento en curso.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def produce():
+        record("queue_wait", time.perf_counter() - submitted)
+        try:
+            with contextlib.closing(fn(*args)) as items:
+                for item in items:
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    loop.run_in_executor(executor, context.run, produce)
+    try:
+        while True:
+            item, error = await asyncio.wait_for(queue.get(), timeout=timeout)
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def shutdown_executors():
+    scrape_executor.shutdown(wait=False, cancel_futures=True)
+    inference_executor.shutdown(wait=False, cancel_futures=True)
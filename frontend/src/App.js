@@ -15,10 +15,12 @@ export default function App() {
     setCards([]);
 
     try {
-      const res = await fetch(`${API_BASE_URL}/predict`, {
+      // /predict/stream devuelve una carta por línea (NDJSON) a medida que se predicen
+      const res = await fetch(`${API_BASE_URL}/predict/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ player_name: playerName }),
+        // live: la tabla muestra precio y versión de carta de futbin, que el índice local no tiene
+        body: JSON.stringify({ player_name: playerName, live: true }),
       });
 
       if (!res.ok) {
@@ -26,8 +28,37 @@ export default function App() {
         throw new Error(errData.error || "Error desconocido");
       }
 
-      const data = await res.json();
-      setCards(data);
+      const handleLines = (lines) => {
+        const newCards = [];
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const item = JSON.parse(line);
+          if (item.error) throw new Error(item.error);
+          newCards.push(item);
+        }
+        if (newCards.length > 0) {
+          setCards((prev) => [...prev, ...newCards]);
+        }
+      };
+
+      if (!res.body || !res.body.getReader) {
+        // Navegadores sin streams: se procesa todo junto al final
+        handleLines((await res.text()).split("\n"));
+      } else {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          // La última línea puede estar incompleta: queda para el próximo pedazo
+          const lines = buffer.split("\n");
+          buffer = lines.pop();
+          handleLines(lines);
+        }
+        handleLines([buffer + decoder.decode()]);
+      }
     } catch (err) {
       setError(err.message);
     }
@@ -534,6 +565,11 @@ export default function App() {
                     </td>
                     <td style={{ padding: '15px', textAlign: 'center', fontWeight: 'bold', color: '#4ECDC4', fontSize: '16px' }}>
                       {formatCurrency(card.predicted_price)}
+                      {card.predicted_price_p10 != null && card.predicted_price_p90 != null && (
+                        <div style={{ fontSize: '11px', fontWeight: 'normal', color: '#888', marginTop: '4px' }}>
+                          {formatCurrency(card.predicted_price_p10)} – {formatCurrency(card.predicted_price_p90)}
+                        </div>
+                      )}
                     </td>
                     <td style={{ padding: '15px', textAlign: 'center' }}>{formatValue(card.age)}</td>
                     <td style={{ padding: '15px', textAlign: 'center', fontWeight: 'bold', color: '#667eea' }}>
@@ -19,6 +19,9 @@ cd backend
 echo "🐍 Instalando dependencias de backend..."
 pip install -r requirements.txt
 
+echo "🗜️  Precomprimiendo el frontend (.gz/.br)..."
+python static_files.py ../frontend/build
+
 echo "🚀 Iniciando servidor FastAPI..."
 uvicorn main:app --host 0.0.0.0 --port 8000
 